@@ -1,5 +1,7 @@
 import os
 
+import pytest
+
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 root_dir_content = os.listdir(BASE_DIR)
 PROJECT_DIR_NAME = 'yatube'
@@ -28,6 +30,7 @@ from django.utils.version import get_version
 assert get_version() < '3.0.0', 'Пожалуйста, используйте версию Django < 3.0.0'
 
 from yatube.settings import INSTALLED_APPS
+from core.test_runner import TEST_SETTINGS
 
 assert any(app in INSTALLED_APPS for app in ['posts.apps.PostsConfig', 'posts']), (
     'Пожалуйста зарегистрируйте приложение в `settings.INSTALLED_APPS`'
@@ -37,3 +40,12 @@ pytest_plugins = [
     'tests.fixtures.fixture_user',
     'tests.fixtures.fixture_data',
 ]
+
+
+@pytest.fixture(autouse=True)
+def test_settings(settings, tmp_path):
+    for name, value in TEST_SETTINGS.items():
+        setattr(settings, name, value)
+    # mixer заполняет поле image: файлы ложатся во временный каталог,
+    # а не в media проекта
+    settings.MEDIA_ROOT = str(tmp_path / 'media')
@@ -1,5 +1,13 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class CoreConfig(AppConfig):
     name = 'core'
+
+    def ready(self):
+        from core import server_timing
+        from core import template_profiler
+        server_timing.install()
+        if settings.TEMPLATE_PROFILER:
+            template_profiler.install()
@@ -0,0 +1,56 @@
+from django.core.cache import cache
+
+# Все заведённые счётчики по именам, для отчёта
+registry = {}
+
+
+def increment(key, amount=1):
+    """Увеличивает счётчик в кэше, заводя его при отсутствии.
+
+    Файловый кэш прибавляет не атомарно: при одновременной записи
+    из нескольких процессов часть прибавок теряется. Для отчётов это
+    допустимо; точные счётчики даёт memcached или Redis.
+    """
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        if not cache.add(key, amount, None):
+            cache.incr(key, amount)
+
+
+class CacheStats:
+    """Счётчики попаданий и промахов кэша.
+
+    Значения лежат в общем для процессов кэше, поэтому команда
+    cache_stats видит сумму по всем процессам.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        registry[name] = self
+
+    def key(self, kind):
+        return f'cache-stats:{self.name}:{kind}'
+
+    def bump(self, kind, amount=1):
+        increment(self.key(kind), amount)
+
+    def hit(self, amount=1):
+        self.bump('hits', amount)
+
+    def miss(self, amount=1):
+        self.bump('misses', amount)
+
+    def report(self):
+        values = cache.get_many([self.key('hits'), self.key('misses')])
+        hits = values.get(self.key('hits'), 0)
+        misses = values.get(self.key('misses'), 0)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / total if total else 0.0,
+        }
+
+    def reset(self):
+        cache.delete_many([self.key('hits'), self.key('misses')])
@@ -0,0 +1,31 @@
+import time
+
+from django.core.cache import cache
+
+from core.server_timing import timed_function
+
+
+def new_version():
+    # Начальная версия берётся от времени, чтобы после очистки кэша
+    # версии не совпали с выданными раньше (например, в ETag)
+    return int(time.time() * 1000)
+
+
+def bump_version(key):
+    """Увеличивает счётчик версии, заводя его при отсутствии."""
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, new_version(), None)
+
+
+@timed_function('cache')
+def get_versions(keys):
+    """Возвращает версии по ключам строкой вида '3.0.1'."""
+    versions = cache.get_many(keys)
+    missing = [key for key in keys if key not in versions]
+    for key in missing:
+        cache.add(key, new_version(), None)
+    if missing:
+        versions.update(cache.get_many(missing))
+    return '.'.join(str(versions.get(key, 0)) for key in keys)
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from core.cache_stats import registry
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кэшей приложения.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить счётчики после отчёта.')
+
+    def handle(self, *args, reset, **options):
+        for name, stats in sorted(registry.items()):
+            report = stats.report()
+            self.stdout.write(
+                f'{name}: попаданий {report["hits"]}, '
+                f'промахов {report["misses"]}, '
+                f'доля попаданий {report["hit_rate"]:.1%}')
+            if reset:
+                stats.reset()
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand
+
+from core import template_profiler
+
+SORT_KEYS = {
+    'self': 'self_ms',
+    'total': 'total_ms',
+    'mean': 'mean_ms',
+    'calls': 'calls',
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Показывает время отрисовки шаблонов, include, block и тегов, '
+        'накопленное при TEMPLATE_PROFILER = True.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sort', choices=SORT_KEYS, default='self',
+            help='По какому столбцу сортировать, по убыванию.')
+        parser.add_argument(
+            '--limit', type=int, default=30,
+            help='Сколько строк показать.')
+        parser.add_argument(
+            '--reset', action='store_true',
+            help='Обнулить замеры после отчёта.')
+
+    def handle(self, *args, sort, limit, reset, **options):
+        rows = sorted(
+            template_profiler.report(),
+            key=lambda row: row[SORT_KEYS[sort]], reverse=True)
+        if not rows:
+            self.stdout.write('Замеров нет.')
+        else:
+            self.stdout.write(
+                f'{"вызовов":>8} {"всего":>10} {"своё":>10} '
+                f'{"среднее":>9}  узел')
+            for row in rows[:limit]:
+                self.stdout.write(
+                    f'{row["calls"]:>8} {row["total_ms"]:>8.1f}мс '
+                    f'{row["self_ms"]:>8.1f}мс {row["mean_ms"]:>7.2f}мс  '
+                    f'{row["label"]}')
+        if reset:
+            template_profiler.reset()
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from core.warmup import warmup
+
+
+class Command(BaseCommand):
+    help = (
+        'Разбирает все шаблоны, заполняет резолвер адресов и импортирует '
+        'тяжёлые модули, как при старте WSGI.')
+
+    def handle(self, *args, **options):
+        result = warmup()
+        for failure in result['failed']:
+            self.stderr.write(f'Шаблон не разобран: {failure}')
+        self.stdout.write(
+            f'Разобрано шаблонов: {result["templates"]}, '
+            f'адресов: {result["urls"]}, '
+            f'за {result["seconds"]:.2f} с')
@@ -0,0 +1,27 @@
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.utils.cache import patch_vary_headers
+
+
+class SessionlessAuthenticationMiddleware(AuthenticationMiddleware):
+    """AuthenticationMiddleware с быстрым путём для анонимов.
+
+    Без cookie сессии пользователь заведомо анонимный: request.user
+    ставится сразу, без ленивого объекта и без обращения к сессии.
+    Нетронутая сессия не загружается и не сохраняется, поэтому анонимное
+    чтение лент не касается хранилища сессий.
+    """
+
+    def process_request(self, request):
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            request.user = AnonymousUser()
+            return
+        super().process_request(request)
+
+    def process_response(self, request, response):
+        # Ответ всё равно зависит от cookie: прочитанная сессия добавила бы
+        # Vary сама, без неё общий кэш отдал бы анонимную страницу всем
+        if settings.SESSION_COOKIE_NAME not in request.COOKIES:
+            patch_vary_headers(response, ('Cookie',))
+        return response
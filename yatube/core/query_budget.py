@@ -0,0 +1,50 @@
+import functools
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(Exception):
+    pass
+
+
+class QueryCounter:
+    """Считает запросы, прошедшие через соединение с БД."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def query_budget(limit):
+    """Объявляет для view предельное число SQL-запросов.
+
+    Проверка включается настройкой QUERY_BUDGET_MODE: 'log' пишет
+    предупреждение в лог, 'raise' бросает QueryBudgetExceeded.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            mode = getattr(settings, 'QUERY_BUDGET_MODE', None)
+            if not mode:
+                return view(request, *args, **kwargs)
+            counter = QueryCounter()
+            with connection.execute_wrapper(counter):
+                response = view(request, *args, **kwargs)
+            if counter.count > limit:
+                message = (
+                    f'{view.__module__}.{view.__name__}: '
+                    f'{counter.count} запросов при бюджете {limit}')
+                if mode == 'raise':
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+        wrapper.query_budget = limit
+        return wrapper
+    return decorator
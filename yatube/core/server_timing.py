@@ -0,0 +1,144 @@
+import contextlib
+import functools
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.template.backends.django import Template
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+# Порядок и описания метрик в заголовке Server-Timing;
+# заголовки HTTP допускают только latin-1, поэтому по-английски
+METRICS = {
+    'mw': 'Middleware',
+    'view': 'View',
+    'db': 'SQL',
+    'tpl': 'Templates',
+    'cache': 'Cache',
+    'thumb': 'Thumbnails',
+    'total': 'Total',
+}
+
+
+class Timings:
+    """Длительности частей одного запроса в миллисекундах."""
+
+    def __init__(self):
+        self.durations = dict.fromkeys(METRICS, 0.0)
+        self.queries = 0
+
+    def add(self, name, seconds):
+        self.durations[name] += seconds * 1000
+
+    def __call__(self, execute, sql, params, many, context):
+        # Обёртка выполнения SQL для connection.execute_wrapper
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.add('db', time.perf_counter() - started)
+
+    def header(self):
+        parts = []
+        for name, description in METRICS.items():
+            if name == 'db':
+                description = f'{description} x{self.queries}'
+            parts.append(
+                f'{name};dur={self.durations[name]:.1f};'
+                f'desc="{description}"')
+        return ', '.join(parts)
+
+
+def current():
+    return getattr(_local, 'timings', None)
+
+
+@contextlib.contextmanager
+def timed(name):
+    """Засчитывает время блока в метрику name текущего запроса."""
+    timings = current()
+    if timings is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.add(name, time.perf_counter() - started)
+
+
+def timed_function(name):
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with timed(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def install():
+    """Засекает отрисовку шаблонов верхнего уровня.
+
+    Вложенные include рисуются внутри них и отдельно не считаются.
+    """
+    if getattr(Template.render, 'server_timing', False):
+        return
+    Template.render = timed_function('tpl')(Template.render)
+    Template.render.server_timing = True
+
+
+class ServerTimingMiddleware:
+    """Добавляет к ответу заголовок Server-Timing и пишет строку в лог.
+
+    Ставится первым в MIDDLEWARE: тогда mw — время остальных middleware
+    до view, view — от вызова view до возврата ответа через них.
+    У потоковых ответов тело отдаётся позже и в total не входит.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timings = _local.timings = Timings()
+        started = time.perf_counter()
+        try:
+            with contextlib.ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(timings))
+                response = self.get_response(request)
+        finally:
+            _local.timings = None
+        total = time.perf_counter() - started
+        timings.add('total', total)
+        view_started = getattr(request, '_server_timing_view', None)
+        if view_started is not None:
+            timings.add('mw', view_started - started)
+            timings.add('view', started + total - view_started)
+        if getattr(settings, 'SERVER_TIMING_HEADER', False):
+            response['Server-Timing'] = timings.header()
+        self.log(request, response, timings)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._server_timing_view = time.perf_counter()
+
+    def log(self, request, response, timings):
+        match = request.resolver_match
+        record = {
+            'url_name': match.view_name if match else None,
+            'method': request.method,
+            'status': response.status_code,
+            'queries': timings.queries,
+        }
+        record.update(
+            (f'{name}_ms', round(value, 1))
+            for name, value in timings.durations.items())
+        logger.info(json.dumps(record, ensure_ascii=False))
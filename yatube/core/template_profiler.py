@@ -0,0 +1,162 @@
+import hashlib
+import threading
+import time
+
+from django.core.cache import cache
+from django.core.signals import request_finished
+from django.template.base import Node
+from django.template.base import Template
+from django.template.base import TextNode
+from django.template.base import VariableNode
+
+from core.cache_stats import increment
+
+LABELS_KEY = 'template-profile:labels'
+
+# Узлы, которые не замеряются: текст и переменные есть в каждой строке
+SKIPPED_NODES = (TextNode, VariableNode)
+
+# Сколько символов тега оставлять в подписи
+LABEL_LENGTH = 60
+
+# Оригинальные методы, подменённые на время профилирования
+_originals = {}
+
+
+class State(threading.local):
+    def __init__(self):
+        # Время вложенных замеров для каждого открытого уровня
+        self.stack = []
+        # Подпись -> [вызовы, общее время, собственное время] в секундах
+        self.totals = {}
+
+
+_state = State()
+
+
+def origin_name(origin):
+    return origin.template_name or origin.name
+
+
+def node_label(node):
+    """Подпись узла: шаблон, строка и текст тега.
+
+    Считается один раз: скомпилированные шаблоны кэширует загрузчик.
+    """
+    label = node.__dict__.get('_profile_label')
+    if label is None:
+        contents = ' '.join(node.token.contents.split())
+        if len(contents) > LABEL_LENGTH:
+            contents = contents[:LABEL_LENGTH - 1] + '…'
+        label = node._profile_label = (
+            f'{origin_name(node.origin)}:{node.token.lineno} '
+            f'{{% {contents} %}}')
+    return label
+
+
+def measure(label, render, *args):
+    """Вызывает render, засчитывая подписи общее и собственное время.
+
+    Собственное — общее без вложенных замеренных узлов.
+    """
+    stack = _state.stack
+    stack.append(0.0)
+    started = time.perf_counter()
+    try:
+        return render(*args)
+    finally:
+        elapsed = time.perf_counter() - started
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        entry = _state.totals.setdefault(label, [0, 0.0, 0.0])
+        entry[0] += 1
+        entry[1] += elapsed
+        entry[2] += max(0.0, elapsed - children)
+
+
+def render_node(node, context):
+    render = _originals['node']
+    if isinstance(node, SKIPPED_NODES) or getattr(node, 'token', None) is None:
+        return render(node, context)
+    return measure(node_label(node), render, node, context)
+
+
+def render_template(template, context):
+    return measure(
+        origin_name(template.origin), _originals['template'],
+        template, context)
+
+
+def install():
+    """Включает замеры шаблонов, include, block и тегов."""
+    if _originals:
+        return
+    _originals['node'] = Node.render_annotated
+    _originals['template'] = Template.render
+    Node.render_annotated = render_node
+    Template.render = render_template
+    request_finished.connect(flush, dispatch_uid='template-profiler')
+
+
+def uninstall():
+    if not _originals:
+        return
+    Node.render_annotated = _originals.pop('node')
+    Template.render = _originals.pop('template')
+    request_finished.disconnect(dispatch_uid='template-profiler')
+    _state.totals = {}
+
+
+def label_key(label, metric):
+    digest = hashlib.md5(label.encode()).hexdigest()
+    return f'template-profile:{digest}:{metric}'
+
+
+def flush(**kwargs):
+    """Переносит замеры запроса в общий кэш, к сумме по процессам."""
+    totals = _state.totals
+    if not totals:
+        return
+    _state.totals = {}
+    for label, (calls, total, own) in totals.items():
+        increment(label_key(label, 'calls'), calls)
+        increment(label_key(label, 'total_us'), round(total * 1_000_000))
+        increment(label_key(label, 'self_us'), round(own * 1_000_000))
+    # Подписи пишутся одним списком; одновременный сброс из двух
+    # процессов может потерять новую подпись до следующего запроса
+    labels = cache.get(LABELS_KEY, [])
+    missing = [label for label in totals if label not in labels]
+    if missing:
+        cache.set(LABELS_KEY, labels + missing, None)
+
+
+def report():
+    """Накопленные замеры: подпись, вызовы и время в миллисекундах."""
+    labels = cache.get(LABELS_KEY, [])
+    values = cache.get_many([
+        label_key(label, metric)
+        for label in labels for metric in ('calls', 'total_us', 'self_us')
+    ])
+    rows = []
+    for label in labels:
+        calls = values.get(label_key(label, 'calls'), 0)
+        if not calls:
+            continue
+        total = values.get(label_key(label, 'total_us'), 0) / 1000
+        rows.append({
+            'label': label,
+            'calls': calls,
+            'total_ms': total,
+            'self_ms': values.get(label_key(label, 'self_us'), 0) / 1000,
+            'mean_ms': total / calls,
+        })
+    return rows
+
+
+def reset():
+    labels = cache.get(LABELS_KEY, [])
+    cache.delete_many([
+        label_key(label, metric)
+        for label in labels for metric in ('calls', 'total_us', 'self_us')
+    ] + [LABELS_KEY])
@@ -0,0 +1,30 @@
+from django.test import override_settings
+from django.test.runner import DiscoverRunner
+
+# Настройки на время тестов, и manage.py test, и pytest. Кэш — в памяти
+# процесса: общий файловый кэш разработчика с его сессиями тесты
+# не трогают. View, превысивший бюджет запросов, роняет любой тест,
+# который его открывает, а не только тесты бюджетов
+TEST_SETTINGS = {
+    'QUERY_BUDGET_MODE': 'raise',
+    'CACHES': {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'yatube-tests',
+        }
+    },
+}
+
+
+class TestRunner(DiscoverRunner):
+    """Запускает тесты с TEST_SETTINGS и восстанавливает настройки
+    после прогона."""
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.test_settings = override_settings(**TEST_SETTINGS)
+        self.test_settings.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.test_settings.disable()
+        super().teardown_test_environment(**kwargs)
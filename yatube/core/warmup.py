@@ -0,0 +1,105 @@
+import importlib
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import TemplateDoesNotExist
+from django.template import TemplateSyntaxError
+from django.template import engines
+from django.urls import get_resolver
+from django.utils import translation
+from PIL import Image
+from sorl.thumbnail import default
+
+logger = logging.getLogger(__name__)
+
+# Модули, которые иначе импортируются только первым запросом к ним
+MODULES = (
+    'django.contrib.admin',
+    'sorl.thumbnail',
+    'sorl.thumbnail.engines.pil_engine',
+    'posts.api',
+    'posts.uploads',
+)
+
+
+def template_names(engine):
+    """Имена всех шаблонов в каталогах загрузчиков движка."""
+    dirs = []
+    for loader in engine.template_loaders:
+        # Кэширующий загрузчик держит настоящие внутри себя
+        for inner in getattr(loader, 'loaders', [loader]):
+            dirs += inner.get_dirs()
+    names = set()
+    for directory in dirs:
+        for root, _, files in os.walk(directory):
+            for file in files:
+                path = os.path.relpath(os.path.join(root, file), directory)
+                names.add(path.replace(os.sep, '/'))
+    return sorted(names)
+
+
+def compile_templates(engine):
+    """Разбирает все шаблоны движка; кэширующий загрузчик их запоминает.
+
+    Возвращает число разобранных шаблонов и описания тех, что
+    разобрать не удалось.
+    """
+    compiled = 0
+    failed = []
+    for name in template_names(engine):
+        try:
+            engine.get_template(name)
+        except (TemplateDoesNotExist, TemplateSyntaxError,
+                UnicodeDecodeError) as error:
+            failed.append(f'{name}: {error}')
+        else:
+            compiled += 1
+    return compiled, failed
+
+
+def populate_urls():
+    """Заполняет резолвер корневых адресов; возвращает их число."""
+    resolver = get_resolver()
+    return len(resolver.reverse_dict) + sum(
+        len(namespace.reverse_dict)
+        for _, namespace in resolver.namespace_dict.values())
+
+
+def warmup():
+    """Делает до первого запроса то, что иначе делает первый запрос.
+
+    База и кэш не трогаются: соединения не должны переходить
+    в процессы, порождённые после прогрева.
+    """
+    started = time.perf_counter()
+    for module in MODULES:
+        importlib.import_module(module)
+    Image.init()
+    # Хранилище и движок sorl-thumbnail создаются при первом обращении
+    default.kvstore
+    default.engine
+    translation.activate(settings.LANGUAGE_CODE)
+    templates = 0
+    failed = []
+    for backend in engines.all():
+        engine = getattr(backend, 'engine', None)
+        if engine is not None:
+            compiled, errors = compile_templates(engine)
+            templates += compiled
+            failed += errors
+    urls = populate_urls()
+    translation.deactivate()
+    result = {
+        'templates': templates,
+        'failed': failed,
+        'urls': urls,
+        'seconds': time.perf_counter() - started,
+    }
+    logger.info(
+        'Прогрев: %s шаблонов, %s адресов за %.2f с',
+        templates, urls, result['seconds'])
+    for failure in failed:
+        logger.warning('Шаблон не разобран: %s', failure)
+    return result
@@ -1,23 +1,159 @@
+import datetime
+
 from django.contrib import admin
+from django.contrib.admin.views.main import ChangeList
+from django.contrib.admin.views.main import ORDER_VAR
+from django.utils import timezone
+
+from .models import Follow, Post, Group
+from .paginator import CachedCountPaginator
+from .paginator import CursorPaginator
+from .search import filter_by_search
 
-from .models import Post, Group
+CURSOR_VAR = 'cursor'
 
 
 class GroupAdmin(admin.ModelAdmin):
-    list_display = ('title', 'slug', 'description')
+    list_display = ('title', 'slug', 'description', 'posts_count')
     search_fields = ('title',)
-    list_filter = ('slug',)
+    paginator = CachedCountPaginator
+    show_full_result_count = False
 
 
 admin.site.register(Group, GroupAdmin)
 
 
+class PubDateFilter(admin.SimpleListFilter):
+    """Фильтр по году и месяцу публикации через диапазоны pub_date.
+
+    Годы берутся из первой и последней даты — два поиска по индексу
+    вместо DISTINCT по всей таблице, как у date_hierarchy.
+    """
+    title = 'Дата'
+    parameter_name = 'pub'
+
+    def lookups(self, request, model_admin):
+        dates = Post.objects.order_by('pub_date').values_list(
+            'pub_date', flat=True)
+        first, last = dates.first(), dates.last()
+        if first is None:
+            return []
+        first = timezone.localtime(first)
+        last = timezone.localtime(last)
+        choices = []
+        for year in range(last.year, first.year - 1, -1):
+            choices.append((str(year), str(year)))
+            if self.value() and self.value()[:4] == str(year):
+                choices += [
+                    (f'{year}-{month:02}', f'{year}-{month:02}')
+                    for month in range(1, 13)]
+        return choices
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        try:
+            start = datetime.datetime.strptime(
+                value, '%Y-%m' if '-' in value else '%Y')
+        except ValueError:
+            return queryset.none()
+        if '-' in value:
+            end = (start + datetime.timedelta(days=32)).replace(day=1)
+        else:
+            end = start.replace(year=start.year + 1)
+        return queryset.filter(
+            pub_date__gte=timezone.make_aware(start),
+            pub_date__lt=timezone.make_aware(end))
+
+
+class CursorChangeList(ChangeList):
+    """Список постов в админке с переходом по курсору (pub_date, id).
+
+    Пока пользователь не выбрал сортировку по колонке, страницы
+    выбираются по ключу без COUNT(*) и OFFSET.
+    """
+
+    def get_filters_params(self, params=None):
+        lookup_params = super().get_filters_params(params)
+        lookup_params.pop(CURSOR_VAR, None)
+        return lookup_params
+
+    def get_query_string(self, new_params=None, remove=None):
+        # Смена фильтра или поиска начинает список сначала
+        new_params = new_params or {}
+        if CURSOR_VAR not in new_params:
+            remove = list(remove or []) + [CURSOR_VAR]
+        return super().get_query_string(new_params, remove)
+
+    def cursor_url(self, cursor):
+        if cursor is None:
+            return None
+        return self.get_query_string({CURSOR_VAR: cursor})
+
+    def get_results(self, request):
+        self.cursor_page = None
+        if ORDER_VAR in self.params:
+            return super().get_results(request)
+        paginator = CursorPaginator(
+            self.queryset.select_related(None).only('id', 'pub_date'),
+            self.list_per_page)
+        page = paginator.get_page(self.params.get(CURSOR_VAR))
+        self.cursor_page = page
+        self.cursor_urls = {
+            'first': self.get_query_string() if page.has_previous() else None,
+            'previous': self.cursor_url(page.previous_cursor),
+            'next': self.cursor_url(page.next_cursor),
+        }
+        self.result_count = len(page)
+        self.show_full_result_count = False
+        self.show_admin_actions = True
+        self.full_result_count = None
+        self.result_list = self.queryset.filter(
+            pk__in=[post.pk for post in page])
+        self.can_show_all = False
+        self.multi_page = page.has_other_pages()
+        self.paginator = paginator
+
+
 class PostAdmin(admin.ModelAdmin):
     list_display = ('pk', 'text', 'pub_date', 'author', 'group',)
     list_editable = ('group',)
+    list_select_related = ('author', 'group')
     search_fields = ('text',)
-    list_filter = ('pub_date',)
+    # Стандартный фильтр по pub_date не ходит в БД за вариантами
+    list_filter = ('pub_date', PubDateFilter)
+    raw_id_fields = ('author',)
     empty_value_display = '-пусто-'
+    paginator = CachedCountPaginator
+    show_full_result_count = False
+
+    def get_changelist(self, request, **kwargs):
+        return CursorChangeList
+
+    def get_search_results(self, request, queryset, search_term):
+        # Полнотекстовый индекс вместо LIKE '%...%' по всей таблице
+        return filter_by_search(queryset, search_term), False
+
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        field = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if db_field.name == 'group' and request is not None:
+            # Варианты групп читаются один раз на запрос,
+            # а не заново для каждой строки list_editable
+            choices = getattr(request, '_group_choices', None)
+            if choices is None:
+                choices = request._group_choices = list(iter(field.choices))
+            field.choices = choices
+        return field
 
 
 admin.site.register(Post, PostAdmin)
+
+
+class FollowAdmin(admin.ModelAdmin):
+    list_display = ('pk', 'user', 'author')
+    list_select_related = ('user', 'author')
+    raw_id_fields = ('user', 'author')
+
+
+admin.site.register(Follow, FollowAdmin)
@@ -0,0 +1,109 @@
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+from django.shortcuts import get_object_or_404
+from django.views.decorators.http import require_GET
+
+from core.query_budget import query_budget
+from posts.image_presets import MIME_TYPES
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+from posts.page_cache import conditional_feed
+from posts.paginator import CursorPaginator
+from posts.settings import API_MAX_PAGE_SIZE
+from posts.settings import POSTS_PER_PAGE
+from posts.thumbnails import ready_variants_many
+
+
+def page_size(request):
+    try:
+        size = int(request.GET.get('limit', POSTS_PER_PAGE))
+    except ValueError:
+        return POSTS_PER_PAGE
+    return min(max(size, 1), API_MAX_PAGE_SIZE)
+
+
+def post_images(post, images):
+    """Варианты картинки поста из images; пока их нет — только оригинал."""
+    if not post.image:
+        return []
+    variants = images[post.image.name]
+    if variants is None:
+        return [{'url': post.image.url}]
+    return [
+        {'url': thumbnail.url, 'width': width,
+         'type': MIME_TYPES[image_format]}
+        for image_format, width, thumbnail in variants
+    ]
+
+
+def serialize_post(post, images):
+    return {
+        'id': post.pk,
+        'text': post.text,
+        'pub_date': post.pub_date,
+        'author': {
+            'username': post.author.username,
+            'full_name': post.author.get_full_name(),
+        },
+        'group': post.group.slug if post.group_id else None,
+        'images': post_images(post, images),
+    }
+
+
+def page_url(request, cursor):
+    if cursor is None:
+        return None
+    query = request.GET.copy()
+    query['cursor'] = cursor
+    return request.build_absolute_uri(
+        f'{request.path}?{query.urlencode()}')
+
+
+def stream_page(request, page, images):
+    """Отдаёт страницу по кусочку на пост, не собирая весь JSON."""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    yield '{"results": ['
+    for number, post in enumerate(page):
+        yield (',' if number else '') + encoder.encode(
+            serialize_post(post, images))
+    yield '], "next": {}, "previous": {}}}'.format(
+        json.dumps(page_url(request, page.next_cursor)),
+        json.dumps(page_url(request, page.previous_cursor)))
+
+
+def feed_response(request, posts):
+    # Страница и варианты картинок выбираются до ответа: поток отдаётся
+    # уже после выхода из view, его запросы бюджет бы не увидел
+    page = CursorPaginator(posts, page_size(request)).get_page(
+        request.GET.get('cursor'))
+    images = ready_variants_many(
+        [post.image for post in page if post.image], 'card')
+    return StreamingHttpResponse(
+        stream_page(request, page, images), content_type='application/json')
+
+
+# В бюджетах лент — запрос за миниатюрами, которых нет в кэше
+@require_GET
+@conditional_feed('index')
+@query_budget(2)
+def index(request):
+    return feed_response(request, Post.objects.feed())
+
+
+@require_GET
+@conditional_feed('group:{slug}')
+@query_budget(3)
+def group_posts(request, slug):
+    group = get_object_or_404(Group, slug=slug)
+    return feed_response(request, group.posts.feed())
+
+
+@require_GET
+@conditional_feed('profile:{username}')
+@query_budget(3)
+def profile(request, username):
+    author = get_object_or_404(User, username=username)
+    return feed_response(request, author.posts.feed())
@@ -3,3 +3,8 @@ from django.apps import AppConfig
 
 class PostsConfig(AppConfig):
     name = 'posts'
+
+    def ready(self):
+        from posts import signals  # noqa: F401
+        # Счётчики хранилища миниатюр должны попасть в отчёт cache_stats
+        from posts import kvstore  # noqa: F401
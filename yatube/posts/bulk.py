@@ -0,0 +1,32 @@
+import itertools
+
+from django.db import connection
+from django.db.models import AutoField
+
+from posts.models import Post
+
+
+def batches(iterable, size):
+    """Разбивает поток на списки по size элементов."""
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def insert_posts(posts):
+    """Вставляет посты с их собственными pub_date, без сигналов.
+
+    bulk_create заменил бы даты текущим временем (auto_now_add).
+    Вставка raw, как при загрузке фикстур, берёт значения полей
+    как есть и не трогает общее для процесса поле модели.
+    """
+    fields = [
+        field for field in Post._meta.concrete_fields
+        if not isinstance(field, AutoField)
+    ]
+    size = max(connection.ops.bulk_batch_size(fields, posts), 1)
+    for batch in batches(posts, size):
+        Post.objects._insert(batch, fields=fields, raw=True)
@@ -0,0 +1,110 @@
+from django.db.models import Count
+from django.db.models import F
+
+from posts.models import AuthorStats
+from posts.models import Follow
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+
+
+def shift_group(group_id, delta):
+    """Сдвигает счётчик постов группы на delta одним UPDATE."""
+    if group_id is None:
+        return
+    groups = Group.objects.filter(pk=group_id)
+    if delta < 0:
+        groups = groups.filter(posts_count__gte=-delta)
+    groups.update(posts_count=F('posts_count') + delta)
+
+
+def shift_author(author_id, delta):
+    """Сдвигает счётчик постов автора, при необходимости заводит его."""
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats.filter(posts_count__gte=-delta).update(
+            posts_count=F('posts_count') + delta)
+        return
+    if not stats.update(posts_count=F('posts_count') + delta):
+        AuthorStats.objects.update_or_create(
+            author_id=author_id,
+            defaults={
+                'posts_count': Post.objects.filter(
+                    author_id=author_id).count()})
+
+
+def shift_followers(author_id, delta):
+    """Сдвигает счётчик подписчиков автора, возвращает новое значение."""
+    stats = AuthorStats.objects.filter(author_id=author_id)
+    if delta < 0:
+        stats.filter(followers_count__gte=-delta).update(
+            followers_count=F('followers_count') + delta)
+    elif not stats.update(followers_count=F('followers_count') + delta):
+        AuthorStats.objects.update_or_create(
+            author_id=author_id,
+            defaults={
+                'posts_count': Post.objects.filter(
+                    author_id=author_id).count(),
+                'followers_count': Follow.objects.filter(
+                    author_id=author_id).count()})
+    return stats.values_list('followers_count', flat=True).first() or 0
+
+
+def post_counts(field, ids):
+    return dict(
+        Post.objects.filter(**{f'{field}__in': ids})
+        .order_by()
+        .values_list(field)
+        .annotate(Count('id')))
+
+
+def recount_groups(ids):
+    """Пересчитывает счётчики групп с заданными id, возвращает число правок."""
+    counts = post_counts('group_id', ids)
+    groups = [
+        group for group in Group.objects.filter(pk__in=ids).only(
+            'id', 'posts_count')
+        if group.posts_count != counts.get(group.pk, 0)
+    ]
+    for group in groups:
+        group.posts_count = counts.get(group.pk, 0)
+    Group.objects.bulk_update(groups, ['posts_count'])
+    return len(groups)
+
+
+def follower_counts(ids):
+    return dict(
+        Follow.objects.filter(author_id__in=ids)
+        .order_by()
+        .values_list('author_id')
+        .annotate(Count('id')))
+
+
+def recount_authors(ids):
+    """Пересчитывает счётчики постов и подписчиков авторов с заданными id."""
+    counts = post_counts('author_id', ids)
+    followers = follower_counts(ids)
+    stats = {
+        item.author_id: item
+        for item in AuthorStats.objects.filter(author_id__in=ids)
+    }
+    changed = [
+        item for item in stats.values()
+        if item.posts_count != counts.get(item.author_id, 0)
+        or item.followers_count != followers.get(item.author_id, 0)
+    ]
+    for item in changed:
+        item.posts_count = counts.get(item.author_id, 0)
+        item.followers_count = followers.get(item.author_id, 0)
+    AuthorStats.objects.bulk_update(
+        changed, ['posts_count', 'followers_count'])
+    missing = [
+        AuthorStats(
+            author_id=author_id,
+            posts_count=counts.get(author_id, 0),
+            followers_count=followers.get(author_id, 0))
+        for author_id in User.objects.filter(pk__in=ids).exclude(
+            pk__in=stats.keys()).values_list('pk', flat=True)
+    ]
+    AuthorStats.objects.bulk_create(missing)
+    return len(changed) + len(missing)
@@ -1,5 +1,9 @@
+from django import forms
 from django.forms import ModelForm
+
 from .models import Post
+from .settings import IMAGE_UPLOAD_MAX_SIZE
+from .uploads import inspect_image
 
 
 class PostForm(ModelForm):
@@ -12,3 +16,18 @@ class PostForm(ModelForm):
         help_text = {
             'text': 'Hапишите свой пост здесь',
             'group': 'Выберите сообщество'}
+
+
+class PostImageForm(forms.Form):
+    image = forms.FileField(
+        label='Картинка',
+        help_text=f'Не больше {IMAGE_UPLOAD_MAX_SIZE // 2 ** 20} МБ')
+
+    def clean_image(self):
+        image = self.cleaned_data['image']
+        if getattr(image, 'truncated', False) or (
+                image.size > IMAGE_UPLOAD_MAX_SIZE):
+            raise forms.ValidationError(
+                f'Файл больше {IMAGE_UPLOAD_MAX_SIZE // 2 ** 20} МБ')
+        self.image_format = inspect_image(image)
+        return image
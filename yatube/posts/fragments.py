@@ -0,0 +1,50 @@
+from django.core.cache import cache
+
+from core import cache_versions
+from core.cache_stats import CacheStats
+from core.server_timing import timed
+from posts.settings import POST_CARD_CACHE_TTL
+
+card_stats = CacheStats('post_cards')
+
+
+def version_key(kind, pk):
+    return f'posts:card-version:{kind}:{pk}'
+
+
+def bump_version(kind, pk):
+    """Меняет версию, после чего все карточки с ней собираются заново."""
+    cache_versions.bump_version(version_key(kind, pk))
+
+
+def card_key(name, post):
+    """Ключ карточки: id поста и версии поста, автора и группы.
+
+    В ключ входит и pub_date, чтобы пост с тем же id после пересоздания
+    базы не получил чужую карточку.
+    """
+    kinds = [('post', post.pk), ('author', post.author_id)]
+    if post.group_id is not None:
+        kinds.append(('group', post.group_id))
+    version = cache_versions.get_versions(
+        [version_key(kind, pk) for kind, pk in kinds])
+    stamp = post.pub_date.timestamp()
+    return f'posts:card:{name}:{post.pk}:{stamp}:{version}'
+
+
+def get_card(name, post, render):
+    """Разметка карточки из кэша или от render.
+
+    render возвращает пару (html, можно ли кэшировать).
+    """
+    key = card_key(name, post)
+    with timed('cache'):
+        html = cache.get(key)
+    if html is not None:
+        card_stats.hit()
+        return html
+    card_stats.miss()
+    html, cacheable = render()
+    if cacheable:
+        cache.set(key, html, POST_CARD_CACHE_TTL)
+    return html
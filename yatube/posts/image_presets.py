@@ -0,0 +1,73 @@
+from sorl.thumbnail.base import EXTENSIONS
+
+# MIME-типы форматов для <source type="...">
+MIME_TYPES = {
+    'JPEG': 'image/jpeg',
+    'PNG': 'image/png',
+    'GIF': 'image/gif',
+    'WEBP': 'image/webp',
+}
+
+# Все пресеты по имени; шаблоны и генерация миниатюр берут их отсюда
+PRESETS = {}
+
+
+class ImagePreset:
+    """Набор вариантов картинки одного назначения.
+
+    Каждая ширина из widths создаётся в каждом формате из formats
+    с пропорциями ratio. Последний формат — запасной для <img>,
+    остальные отдаются через <source> тем браузерам, что их понимают.
+    """
+
+    def __init__(self, name, widths, ratio, sizes,
+                 formats=('WEBP', 'JPEG'), quality=80, crop='center'):
+        unknown = set(formats) - set(EXTENSIONS)
+        if unknown:
+            raise ValueError(f'Неизвестные форматы: {", ".join(unknown)}')
+        self.name = name
+        self.widths = tuple(sorted(widths))
+        self.ratio = ratio
+        self.sizes = sizes
+        self.formats = tuple(formats)
+        self.quality = quality
+        self.crop = crop
+
+    def __repr__(self):
+        return f'<ImagePreset {self.name}>'
+
+    @property
+    def fallback_format(self):
+        return self.formats[-1]
+
+    def geometry(self, width):
+        width_ratio, height_ratio = self.ratio
+        return f'{width}x{round(width * height_ratio / width_ratio)}'
+
+    def options(self, image_format):
+        return {
+            'crop': self.crop,
+            'upscale': True,
+            'format': image_format,
+            'quality': self.quality,
+        }
+
+    def variants(self):
+        """Все варианты пресета: (формат, ширина, геометрия, опции)."""
+        for image_format in self.formats:
+            for width in self.widths:
+                yield (image_format, width, self.geometry(width),
+                       self.options(image_format))
+
+
+def register(preset):
+    PRESETS[preset.name] = preset
+    return preset
+
+
+# Картинка карточки поста: во всю ширину колонки ленты
+register(ImagePreset(
+    'card',
+    widths=(320, 640, 960),
+    ratio=(960, 339),
+    sizes='(min-width: 768px) 720px, 100vw'))
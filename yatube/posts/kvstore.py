@@ -0,0 +1,154 @@
+import threading
+import time
+from collections import OrderedDict
+
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import deserialize_image_file
+from sorl.thumbnail.kvstores import cached_db_kvstore
+from sorl.thumbnail.kvstores.base import add_prefix
+from sorl.thumbnail.models import KVStore as KVStoreModel
+
+from core.cache_stats import CacheStats
+from posts.settings import THUMBNAIL_LRU_SIZE
+from posts.settings import THUMBNAIL_LRU_TTL
+
+kvstore_stats = CacheStats('thumbnail-kvstore')
+
+# Через сколько обращений счётчики процесса сбрасываются в общий кэш
+STATS_FLUSH_EVERY = 100
+
+
+class LRUCache:
+    """Ограниченный по размеру словарь с вытеснением давно не читанного
+    и сроком жизни записей."""
+
+    def __init__(self, size, ttl):
+        self.size = size
+        self.ttl = ttl
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] > time.monotonic():
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self.entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = (time.monotonic() + self.ttl, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+    def delete(self, *keys):
+        with self.lock:
+            for key in keys:
+                self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def take_counts(self):
+        """Счётчики с прошлого вызова; сами счётчики обнуляются."""
+        with self.lock:
+            counts = self.hits, self.misses
+            self.hits = self.misses = 0
+            return counts
+
+
+class KVStore(cached_db_kvstore.KVStore):
+    """Хранилище sorl-thumbnail с LRU в памяти процесса перед кэшем и БД.
+
+    В памяти держатся только найденные записи: отсутствие миниатюры
+    быстро устаревает, когда её создаёт рабочий процесс.
+    Другие процессы узнают о замене записи не позже THUMBNAIL_LRU_TTL.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.local = LRUCache(THUMBNAIL_LRU_SIZE, THUMBNAIL_LRU_TTL)
+
+    def flush_stats(self, force=False):
+        local = self.local
+        if not force and local.hits + local.misses < STATS_FLUSH_EVERY:
+            return
+        hits, misses = local.take_counts()
+        if hits:
+            kvstore_stats.hit(hits)
+        if misses:
+            kvstore_stats.miss(misses)
+
+    def clear(self, delete_thumbnails=False):
+        self.local.clear()
+        super().clear(delete_thumbnails)
+
+    def get_many(self, image_files):
+        """Как get для нескольких картинок, список в том же порядке.
+
+        Кэш читается одним get_many, БД — не больше чем одним запросом.
+        """
+        keys = [add_prefix(image_file.key) for image_file in image_files]
+        values = self._get_many_raw(keys)
+        return [
+            deserialize_image_file(values[key]) if values[key] else None
+            for key in keys
+        ]
+
+    def _get_many_raw(self, keys):
+        values = {}
+        for key in keys:
+            value = self.local.get(key)
+            if value is not None:
+                values[key] = value
+        missing = [key for key in keys if key not in values]
+        fetched = self.cache.get_many(missing) if missing else {}
+        missing = [key for key in missing if key not in fetched]
+        if missing:
+            found = dict(KVStoreModel.objects.filter(
+                key__in=missing).values_list('key', 'value'))
+            # Как и _get_raw, отсутствие записи тоже кэшируется
+            loaded = {
+                key: found.get(key, cached_db_kvstore.EMPTY_VALUE)
+                for key in missing
+            }
+            self.cache.set_many(
+                loaded, thumbnail_settings.THUMBNAIL_CACHE_TIMEOUT)
+            fetched.update(loaded)
+        for key, value in fetched.items():
+            if value == cached_db_kvstore.EMPTY_VALUE:
+                value = None
+            if value is not None:
+                self.local.set(key, value)
+            values[key] = value
+        self.flush_stats()
+        return {key: values.get(key) for key in keys}
+
+    def _get_raw(self, key):
+        value = self.local.get(key)
+        if value is None:
+            value = super()._get_raw(key)
+            if value is not None:
+                self.local.set(key, value)
+        self.flush_stats()
+        return value
+
+    def _set_raw(self, key, value):
+        super()._set_raw(key, value)
+        self.local.set(key, value)
+
+    def _delete_raw(self, *keys):
+        self.local.delete(*keys)
+        super()._delete_raw(*keys)
@@ -0,0 +1,205 @@
+import json
+import platform
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+from django.test import Client
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from django.test.utils import setup_test_environment
+from django.test.utils import teardown_test_environment
+from django.urls import reverse
+
+from posts.models import Group
+from posts.models import User
+from posts.seeding import seed_posts
+
+# Метрики, рост которых считается регрессией, и допуск к ним:
+# время и память шумят, число запросов — нет
+METRICS = {
+    'p50_ms': True,
+    'p90_ms': True,
+    'p99_ms': True,
+    'peak_kb': True,
+    'queries': False,
+}
+
+
+def percentile(values, share):
+    return values[min(len(values) - 1, int(share * len(values)))]
+
+
+def scenarios(author, group, post):
+    """Замеряемые запросы: (имя, метод, адрес, данные, ожидаемый код)."""
+    return [
+        ('index', 'get', reverse('posts:index'), None, 200),
+        ('group_posts', 'get', reverse(
+            'posts:group_posts', kwargs={'slug': group.slug}), None, 200),
+        ('profile', 'get', reverse(
+            'posts:profile', kwargs={'username': author.username}),
+         None, 200),
+        ('post_detail', 'get', reverse(
+            'posts:post_detail', kwargs={'post_id': post.pk}), None, 200),
+        ('post_create', 'post', reverse('posts:post_create'),
+         {'text': 'Замер', 'group': group.pk}, 302),
+        ('post_edit', 'post', reverse(
+            'posts:post_edit', kwargs={'post_id': post.pk}),
+         {'text': 'Замер правки', 'group': group.pk}, 302),
+    ]
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий результатов относительно базовых."""
+    regressions = []
+    for view, metrics in results['views'].items():
+        base = baseline['views'].get(view)
+        if base is None:
+            continue
+        for metric, noisy in METRICS.items():
+            limit = base[metric] * (1 + tolerance) if noisy else base[metric]
+            if metrics[metric] > limit:
+                regressions.append(
+                    f'{view}.{metric}: {metrics[metric]} '
+                    f'при базовом {base[metric]}')
+    return regressions
+
+
+class Command(BaseCommand):
+    help = (
+        'Замеряет задержки, число запросов и пиковую память основных view '
+        'на отдельной тестовой базе заданного размера. Кэш на время замера '
+        'подменяется пустым файловым во временном каталоге: записи '
+        'прошлых замеров и dev-сервера не влияют на время, а общий кэш '
+        'сайта не трогается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--posts', type=int, default=1000,
+            help='Сколько постов создать: 1000, 100000, 1000000.')
+        parser.add_argument(
+            '--requests', type=int, default=50,
+            help='Сколько раз запрашивать каждый view.')
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--output', help='Куда записать результаты в JSON.')
+        parser.add_argument(
+            '--baseline', help='JSON с базовыми результатами для сравнения.')
+        parser.add_argument(
+            '--tolerance', type=float, default=0.2,
+            help='Допустимый рост времени и памяти, доля от базовых.')
+
+    def handle(self, *args, posts, requests, seed, output, baseline,
+               tolerance, **options):
+        baseline_data = None
+        if baseline:
+            with open(baseline, encoding='utf-8') as stream:
+                baseline_data = json.load(stream)
+            if baseline_data['posts'] != posts:
+                raise CommandError(
+                    f'Базовые результаты сняты на {baseline_data["posts"]} '
+                    f'постах, а не на {posts}')
+        cache_dir = tempfile.mkdtemp()
+        fresh_cache = override_settings(CACHES={
+            'default': {
+                'BACKEND':
+                    'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cache_dir,
+            }
+        })
+        fresh_cache.enable()
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(
+            verbosity=0, autoclobber=True)
+        try:
+            started = time.perf_counter()
+            author_ids, group_ids = seed_posts(posts, seed=seed)
+            self.stdout.write(
+                f'Создано {posts} постов '
+                f'за {time.perf_counter() - started:.1f} с')
+            results = self.measure(
+                posts, requests, author_ids[0], group_ids[0])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+            fresh_cache.disable()
+            shutil.rmtree(cache_dir, ignore_errors=True)
+        self.report(results)
+        if output:
+            with open(output, 'w', encoding='utf-8') as stream:
+                json.dump(results, stream, ensure_ascii=False, indent=2)
+        if baseline_data is not None:
+            regressions = compare(results, baseline_data, tolerance)
+            if regressions:
+                raise CommandError(
+                    'Регрессии:\n' + '\n'.join(regressions))
+            self.stdout.write('Регрессий нет.')
+
+    def measure(self, posts, requests, author_id, group_id):
+        # Самые активные автор и группа — первые по Ципфу
+        author = User.objects.get(pk=author_id)
+        group = Group.objects.get(pk=group_id)
+        post = author.posts.order_by('pub_date', 'id')[
+            author.post_stats.posts_count // 2]
+        # Вошедший автор: страницы рисуются, а не берутся из кэша анонимов
+        client = Client()
+        client.force_login(author)
+        results = {
+            'posts': posts,
+            'requests': requests,
+            'python': platform.python_version(),
+            'database': connection.vendor,
+            'views': {},
+        }
+        for name, method, url, data, status in scenarios(
+                author, group, post):
+            results['views'][name] = self.measure_view(
+                client, method, url, data, status, requests)
+        # Аноним без cookie сессии: быстрый путь и кэш страниц
+        results['views']['index_anonymous'] = self.measure_view(
+            Client(), 'get', reverse('posts:index'), None, 200, requests)
+        return results
+
+    def measure_view(self, client, method, url, data, status, requests):
+        send = getattr(client, method)
+        # Первый запрос прогревает кэши и заодно считает SQL.
+        # Журнал запросов ограничен по длине, заполненный не растёт
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = send(url, data)
+        if response.status_code != status:
+            raise CommandError(
+                f'{url}: ответ {response.status_code} вместо {status}')
+        timings = []
+        for _ in range(requests):
+            started = time.perf_counter()
+            send(url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        timings.sort()
+        # Память меряется отдельным запросом: tracemalloc замедляет код
+        tracemalloc.start()
+        send(url, data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            'p50_ms': round(percentile(timings, 0.5), 2),
+            'p90_ms': round(percentile(timings, 0.9), 2),
+            'p99_ms': round(percentile(timings, 0.99), 2),
+            'mean_ms': round(sum(timings) / len(timings), 2),
+            'queries': len(queries),
+            'peak_kb': round(peak / 1024, 1),
+        }
+
+    def report(self, results):
+        self.stdout.write(
+            f'{"view":<16} {"p50":>8} {"p90":>8} {"p99":>8} '
+            f'{"SQL":>4} {"память":>10}')
+        for name, metrics in results['views'].items():
+            self.stdout.write(
+                f'{name:<16} {metrics["p50_ms"]:>6.1f}мс '
+                f'{metrics["p90_ms"]:>6.1f}мс {metrics["p99_ms"]:>6.1f}мс '
+                f'{metrics["queries"]:>4} {metrics["peak_kb"]:>8.0f}КБ')
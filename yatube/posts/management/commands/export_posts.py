@@ -0,0 +1,171 @@
+import csv
+import datetime
+import json
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import F
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.utils.dateparse import parse_datetime
+
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+from posts.paginator import InvalidCursor
+from posts.paginator import pack_token
+from posts.paginator import unpack_token
+
+# Что выгружается: запрос, поля записи и ключ обхода.
+# Поля постов совпадают с теми, что читает import_posts
+EXPORTS = {
+    'posts': (
+        lambda: Post.objects.annotate(
+            author_name=F('author__username'),
+            group_slug=F('group__slug')),
+        {'id': 'id', 'text': 'text', 'pub_date': 'pub_date',
+         'author': 'author_name', 'group': 'group_slug', 'image': 'image'},
+        ('pub_date', 'id'),
+    ),
+    'groups': (
+        lambda: Group.objects.all(),
+        {'id': 'id', 'title': 'title', 'slug': 'slug',
+         'description': 'description'},
+        ('id',),
+    ),
+    'users': (
+        lambda: User.objects.all(),
+        {'id': 'id', 'username': 'username', 'first_name': 'first_name',
+         'last_name': 'last_name', 'date_joined': 'date_joined'},
+        ('id',),
+    ),
+}
+
+
+def parse_moment(value, name):
+    moment = parse_datetime(value)
+    if moment is None:
+        date = parse_date(value)
+        if date is None:
+            raise CommandError(f'{name}: ожидается дата или дата и время')
+        moment = datetime.datetime.combine(date, datetime.time.min)
+    if timezone.is_naive(moment):
+        moment = timezone.make_aware(moment)
+    return moment
+
+
+def after_key(key_fields, values):
+    """Условие «строго после ключа» для обхода по (поле1, поле2)."""
+    if len(key_fields) == 1:
+        return Q(**{f'{key_fields[0]}__gt': values[0]})
+    first, second = key_fields
+    return (Q(**{f'{first}__gt': values[0]})
+            | Q(**{first: values[0], f'{second}__gt': values[1]}))
+
+
+def encode_key(key):
+    return pack_token(*(
+        part.isoformat() if hasattr(part, 'isoformat') else part
+        for part in key))
+
+
+def decode_key(key_fields, token):
+    try:
+        parts = unpack_token(token, len(key_fields))
+        if key_fields[0] == 'pub_date':
+            moment = parse_datetime(parts[0])
+            if moment is None:
+                raise ValueError
+            return moment, int(parts[1])
+        return (int(parts[0]),)
+    except (InvalidCursor, ValueError):
+        raise CommandError('Некорректный курсор')
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает посты, группы или пользователей в NDJSON или CSV '
+        'пачками по ключу, не держа таблицу в памяти.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'what', nargs='?', default='posts', choices=sorted(EXPORTS))
+        parser.add_argument(
+            '--format', dest='output_format', default='jsonl',
+            choices=('jsonl', 'csv'))
+        parser.add_argument(
+            '--output', help='Файл для выгрузки; по умолчанию stdout.')
+        parser.add_argument(
+            '--chunk-size', type=int, default=2000,
+            help='Сколько строк читать одним запросом.')
+        parser.add_argument(
+            '--cursor',
+            help='Продолжить выгрузку после этого курсора.')
+        parser.add_argument('--group', help='Только посты группы (slug).')
+        parser.add_argument(
+            '--author', help='Только посты автора (username).')
+        parser.add_argument(
+            '--since', help='Посты не раньше даты (ISO 8601).')
+        parser.add_argument(
+            '--until', help='Посты раньше даты (ISO 8601).')
+
+    def handle(self, *args, what, output_format, output, chunk_size,
+               cursor, group, author, since, until, **options):
+        make_queryset, fields, key_fields = EXPORTS[what]
+        queryset = make_queryset()
+        filters = {'group': group, 'author': author,
+                   'since': since, 'until': until}
+        if what != 'posts' and any(filters.values()):
+            raise CommandError('Фильтры применимы только к постам')
+        if group:
+            queryset = queryset.filter(group__slug=group)
+        if author:
+            queryset = queryset.filter(author__username=author)
+        if since:
+            queryset = queryset.filter(
+                pub_date__gte=parse_moment(since, '--since'))
+        if until:
+            queryset = queryset.filter(
+                pub_date__lt=parse_moment(until, '--until'))
+        key = decode_key(key_fields, cursor) if cursor else None
+        stream = (open(output, 'w', encoding='utf-8', newline='')
+                  if output else self.stdout)
+        try:
+            self.export(stream, queryset, fields, key_fields, key,
+                        output_format, chunk_size)
+        finally:
+            if output:
+                stream.close()
+
+    def export(self, stream, queryset, fields, key_fields, key,
+               output_format, chunk_size):
+        columns = list(fields)
+        if output_format == 'csv':
+            writer = csv.DictWriter(
+                stream, fieldnames=columns, lineterminator='\n')
+            writer.writeheader()
+            write = writer.writerow
+        else:
+            def write(record):
+                stream.write(json.dumps(
+                    record, cls=DjangoJSONEncoder, ensure_ascii=False) + '\n')
+        queryset = queryset.order_by(*key_fields)
+        exported = 0
+        while True:
+            chunk = queryset
+            if key is not None:
+                chunk = chunk.filter(after_key(key_fields, key))
+            rows = list(chunk.values(*fields.values())[:chunk_size])
+            if not rows:
+                break
+            for row in rows:
+                write({column: row[field] for column, field in fields.items()})
+            stream.flush()
+            key = tuple(rows[-1][field] for field in key_fields)
+            exported += len(rows)
+            # Курсор печатается, когда пачка уже записана: с него
+            # прерванную выгрузку можно продолжить без дублей
+            self.stderr.write(
+                f'Выгружено {exported}, курсор {encode_key(key)}')
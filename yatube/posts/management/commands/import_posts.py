@@ -0,0 +1,179 @@
+import contextlib
+import csv
+import json
+import sys
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.bulk import batches
+from posts.bulk import insert_posts
+from posts.counters import recount_authors
+from posts.counters import recount_groups
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+from posts.page_cache import bump_feeds
+from posts.page_cache import post_feeds
+from posts.timelines import fan_out_recent
+
+
+def read_jsonl(stream):
+    for number, line in enumerate(stream, 1):
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as error:
+            raise CommandError(f'Строка {number}: {error}')
+
+
+def read_csv(stream):
+    yield from csv.DictReader(stream)
+
+
+READERS = {
+    'jsonl': read_jsonl,
+    'csv': read_csv,
+}
+
+
+def make_author(username):
+    author = User(username=username)
+    author.set_unusable_password()
+    return author
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает посты из JSONL или CSV пачками, без сигналов. '
+        'Поля записи: text, author (username), group (slug), pub_date, '
+        'image.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл с постами; - — stdin.')
+        parser.add_argument(
+            '--format', dest='input_format', choices=sorted(READERS),
+            help='Формат файла; по умолчанию по расширению.')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько постов вставлять за одну транзакцию.')
+        parser.add_argument(
+            '--create-authors', action='store_true',
+            help='Заводить неизвестных авторов без пароля.')
+        parser.add_argument(
+            '--create-groups', action='store_true',
+            help='Заводить неизвестные группы с заголовком из slug.')
+
+    def handle(self, *args, path, input_format, batch_size, create_authors,
+               create_groups, **options):
+        if input_format is None:
+            input_format = 'csv' if path.endswith('.csv') else 'jsonl'
+        self.authors = {}
+        self.groups = {}
+        self.create_authors = create_authors
+        self.create_groups = create_groups
+        self.skipped = 0
+        imported = 0
+        started = time.perf_counter()
+        with self.open_input(path) as stream:
+            for batch in batches(READERS[input_format](stream), batch_size):
+                with transaction.atomic():
+                    posts = self.build_posts(batch)
+                    insert_posts(posts)
+                imported += len(posts)
+                elapsed = max(time.perf_counter() - started, 1e-6)
+                self.stdout.write(
+                    f'Загружено {imported}, пропущено {self.skipped}, '
+                    f'{imported / elapsed:.0f} строк/с')
+        self.refresh_counters()
+        self.stdout.write(
+            f'Готово: {imported} постов '
+            f'за {time.perf_counter() - started:.1f} с. '
+            f'Миниатюры картинок создаст manage.py regenerate_images.')
+
+    @contextlib.contextmanager
+    def open_input(self, path):
+        if path == '-':
+            yield sys.stdin
+            return
+        try:
+            stream = open(path, encoding='utf-8', newline='')
+        except OSError as error:
+            raise CommandError(f'Не удалось открыть {path}: {error}')
+        with stream:
+            yield stream
+
+    def resolve(self, known, model, field, names, create, make):
+        """Дополняет карту имя → id одним запросом на пачку."""
+        missing = {name for name in names if name and name not in known}
+        if not missing:
+            return
+        lookup = {f'{field}__in': missing}
+        known.update(model.objects.filter(**lookup).values_list(field, 'pk'))
+        missing -= known.keys()
+        if missing and create:
+            model.objects.bulk_create(make(name) for name in sorted(missing))
+            known.update(
+                model.objects.filter(**lookup).values_list(field, 'pk'))
+
+    def build_posts(self, rows):
+        self.resolve(
+            self.authors, User, 'username',
+            [row.get('author') for row in rows], self.create_authors,
+            make_author)
+        self.resolve(
+            self.groups, Group, 'slug',
+            [row.get('group') for row in rows], self.create_groups,
+            lambda slug: Group(title=slug, slug=slug))
+        now = timezone.now()
+        posts = []
+        for row in rows:
+            post = self.build_post(row, now)
+            if post is None:
+                self.skipped += 1
+            else:
+                posts.append(post)
+        return posts
+
+    def build_post(self, row, now):
+        author_id = self.authors.get(row.get('author'))
+        group = row.get('group')
+        group_id = self.groups.get(group)
+        if not row.get('text') or author_id is None or (
+                group and group_id is None):
+            return None
+        pub_date = now
+        if row.get('pub_date'):
+            try:
+                pub_date = parse_datetime(row['pub_date'])
+            except ValueError:
+                pub_date = None
+            if pub_date is None:
+                return None
+            if timezone.is_naive(pub_date):
+                pub_date = timezone.make_aware(pub_date)
+        return Post(
+            text=row['text'],
+            author_id=author_id,
+            group_id=group_id,
+            pub_date=pub_date,
+            image=row.get('image') or '')
+
+    def refresh_counters(self):
+        # Вставка не шлёт сигналов: счётчики, кэш лент и ленты
+        # подписок обновляются один раз после загрузки
+        author_ids = list(self.authors.values())
+        group_ids = list(self.groups.values())
+        for ids in batches(group_ids, 1000):
+            recount_groups(ids)
+        for ids in batches(author_ids, 1000):
+            recount_authors(ids)
+            bump_feeds(post_feeds(ids, []))
+            fan_out_recent(ids)
+        for ids in batches(group_ids, 1000):
+            bump_feeds(post_feeds([], ids))
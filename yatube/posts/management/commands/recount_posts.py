@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+
+from posts.counters import recount_authors
+from posts.counters import recount_groups
+from posts.models import Group
+from posts.models import User
+
+
+def id_batches(model, batch_size):
+    """Выдаёт id модели пачками по возрастанию без OFFSET."""
+    last_id = 0
+    while True:
+        ids = list(
+            model.objects.filter(pk__gt=last_id)
+            .order_by('pk')
+            .values_list('pk', flat=True)[:batch_size])
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает счётчики постов и подписчиков у авторов и групп.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Сколько авторов или групп пересчитывать за один проход.')
+
+    def handle(self, *args, batch_size, **options):
+        for name, model, recount in (
+            ('групп', Group, recount_groups),
+            ('авторов', User, recount_authors),
+        ):
+            fixed = sum(
+                recount(ids) for ids in id_batches(model, batch_size))
+            self.stdout.write(f'Исправлено счётчиков {name}: {fixed}')
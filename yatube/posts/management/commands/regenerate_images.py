@@ -0,0 +1,40 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+from posts.workers import init_worker
+
+
+class Command(BaseCommand):
+    help = (
+        'Создаёт варианты картинок существующих постов по всем пресетам '
+        'в нескольких процессах.')
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Число процессов; 0 — всё в текущем процессе.')
+        parser.add_argument(
+            '--force', action='store_true',
+            help='Удалить готовые варианты и создать заново.')
+
+    def handle(self, *args, workers, force, **options):
+        names = list(
+            Post.objects.exclude(image='')
+            .order_by('image')
+            .values_list('image', flat=True)
+            .distinct())
+        regenerate = partial(thumbnails.regenerate, force=force)
+        if not workers:
+            done = sum(1 for _ in map(regenerate, names))
+        else:
+            with ProcessPoolExecutor(
+                    max_workers=workers,
+                    initializer=init_worker) as pool:
+                done = sum(1 for _ in pool.map(
+                    regenerate, names, chunksize=16))
+        self.stdout.write(f'Обработано картинок: {done}')
@@ -0,0 +1,70 @@
+import random
+import sqlite3
+import time
+
+from django.core.management.base import BaseCommand
+
+from posts import search
+from posts.seeding import make_dictionary
+from posts.seeding import zipf_weights
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает поиск через FTS5 и LIKE на синтетических постах '
+        'во временной базе SQLite в памяти.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=1_000_000)
+        parser.add_argument('--words', type=int, default=30,
+                            help='Слов в одном посте.')
+        parser.add_argument('--dictionary', type=int, default=50_000,
+                            help='Размер словаря.')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, posts, words, dictionary, repeat, seed,
+               **options):
+        rnd = random.Random(seed)
+        dictionary = make_dictionary(rnd, dictionary)
+        # Частоты слов по закону Ципфа, как в живых текстах
+        cum_weights = zipf_weights(len(dictionary))
+        db = sqlite3.connect(':memory:')
+        db.execute(
+            'CREATE TABLE posts_post (id INTEGER PRIMARY KEY, text TEXT)')
+        for statement in search.FTS_SCHEMA:
+            db.execute(statement)
+        started = time.perf_counter()
+        db.executemany(
+            'INSERT INTO posts_post (text) VALUES (?)',
+            ((' '.join(rnd.choices(
+                dictionary, cum_weights=cum_weights, k=words)),)
+             for _ in range(posts)))
+        db.commit()
+        self.stdout.write(
+            f'Загружено {posts} постов с индексацией '
+            f'за {time.perf_counter() - started:.1f} с')
+        # Запросы из слов средней частоты: не стоп-слова и не редкости
+        middle = dictionary[len(dictionary) // 100:len(dictionary) // 10]
+        queries = [rnd.sample(middle, 2) for _ in range(repeat)]
+        like_sql = (
+            'SELECT id FROM posts_post WHERE text LIKE ? AND text LIKE ? '
+            'ORDER BY id DESC LIMIT 10')
+        fts_sql = (
+            f'SELECT rowid FROM {search.FTS_TABLE} '
+            f'WHERE {search.FTS_TABLE} MATCH ? ORDER BY rank LIMIT 10')
+        cases = [
+            ('LIKE', like_sql, lambda q: [f'%{word}%' for word in q]),
+            ('FTS5', fts_sql, lambda q: [search.match_expression(q)]),
+        ]
+        for name, sql, params in cases:
+            timings = []
+            for query in queries:
+                started = time.perf_counter()
+                db.execute(sql, params(query)).fetchall()
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            median = timings[len(timings) // 2] * 1000
+            self.stdout.write(
+                f'{name}: медиана {median:.1f} мс, '
+                f'максимум {timings[-1] * 1000:.1f} мс')
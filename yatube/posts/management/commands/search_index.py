@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.db import connection
+
+from posts import search
+
+
+class Command(BaseCommand):
+    help = 'Пересоздаёт полнотекстовый индекс постов (SQLite FTS5).'
+
+    def handle(self, *args, **options):
+        if not search.fts5_supported(connection):
+            raise CommandError(
+                'База не поддерживает FTS5, поиск работает без индекса.')
+        search.install_index(connection)
+        self.stdout.write('Индекс постов пересоздан.')
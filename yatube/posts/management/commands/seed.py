@@ -0,0 +1,67 @@
+import os
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.management.base import CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from posts.models import User
+from posts.seeding import seed_posts
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет базу синтетическими пользователями, группами и постами '
+        'с распределением по Ципфу. При одном зерне результат одинаков.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--posts', type=int, default=100_000)
+        parser.add_argument(
+            '--users', type=int,
+            help='Число авторов; по умолчанию сотая часть постов.')
+        parser.add_argument(
+            '--groups', type=int,
+            help='Число групп; по умолчанию тысячная часть постов.')
+        parser.add_argument(
+            '--days', type=int, default=365,
+            help='За сколько дней до --end распределить даты постов.')
+        parser.add_argument(
+            '--end', help='Дата последних постов (ISO 8601); '
+                          'по умолчанию сейчас. Нужна для повторяемости.')
+        parser.add_argument(
+            '--images', type=int, default=0,
+            help='Сколько разных картинок создать для постов.')
+        parser.add_argument(
+            '--image-share', type=float, default=0.2,
+            help='Доля постов с картинкой, если картинки есть.')
+        parser.add_argument(
+            '--workers', type=int, default=os.cpu_count(),
+            help='Процессов для генерации; 0 — всё в текущем.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, posts, users, groups, days, end, images,
+               image_share, workers, seed, **options):
+        if end is not None:
+            end = parse_datetime(end)
+            if end is None:
+                raise CommandError('--end: ожидается дата и время')
+            if timezone.is_naive(end):
+                end = timezone.make_aware(end)
+        if User.objects.filter(username__startswith=f'seed{seed}_').exists():
+            raise CommandError(
+                f'Данные с зерном {seed} уже есть, возьмите другое зерно.')
+        started = time.perf_counter()
+
+        def progress(done):
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            self.stdout.write(
+                f'Создано {done} постов, {done / elapsed:.0f} строк/с')
+
+        seed_posts(
+            posts, seed=seed, users=users, groups=groups, days=days, end=end,
+            images=images, image_share=image_share, workers=workers,
+            progress=progress)
+        self.stdout.write(
+            f'Готово за {time.perf_counter() - started:.1f} с. '
+            f'Миниатюры картинок создаст manage.py regenerate_images.')
@@ -0,0 +1,140 @@
+import datetime
+import functools
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.views.decorators.http import condition
+
+from core.cache_stats import CacheStats
+from core.cache_versions import bump_version
+from core.cache_versions import get_versions
+from core.server_timing import timed
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+from posts.settings import PAGE_CACHE_TTL
+
+# Лента, версия которой входит в ключ каждой страницы: её меняют
+# правки групп и пользователей, которые видны во многих лентах сразу
+SITE_FEED = 'site'
+
+page_stats = CacheStats('feed_pages')
+
+
+def feed_version_key(feed):
+    return f'posts:feed-version:{feed}'
+
+
+def feed_changed_key(feed):
+    return f'posts:feed-changed:{feed}'
+
+
+def bump_feeds(feeds):
+    now = time.time()
+    for feed in feeds:
+        bump_version(feed_version_key(feed))
+        cache.set(feed_changed_key(feed), now, None)
+
+
+def profile_feeds(author_ids):
+    """Имена лент авторов."""
+    return [
+        f'profile:{username}' for username in User.objects.filter(
+            pk__in=author_ids).values_list('username', flat=True)]
+
+
+def post_feeds(author_ids, group_ids):
+    """Имена лент, в которых показываются посты этих авторов и групп."""
+    feeds = ['index']
+    author_ids = [pk for pk in author_ids if pk is not None]
+    group_ids = [pk for pk in group_ids if pk is not None]
+    feeds += profile_feeds(author_ids)
+    if group_ids:
+        feeds += [
+            f'group:{slug}' for slug in Group.objects.filter(
+                pk__in=group_ids).values_list('slug', flat=True)]
+    return feeds
+
+
+def cache_anonymous_page(feed):
+    """Кэширует ответ view для анонимных GET-запросов.
+
+    feed — шаблон имени ленты, заполняется аргументами view:
+    'group:{slug}'. Ключ включает адрес с параметрами страницы
+    и версии ленты, так что новый пост виден сразу после публикации.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(request, *args, **kwargs):
+            if request.method != 'GET' or request.user.is_authenticated:
+                return view(request, *args, **kwargs)
+            versions = get_versions([
+                feed_version_key(SITE_FEED),
+                feed_version_key(feed.format(**kwargs)),
+            ])
+            path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+            key = f'posts:page:{view.__name__}:{path}:{versions}'
+            with timed('cache'):
+                response = cache.get(key)
+            if response is not None:
+                page_stats.hit()
+                return response
+            page_stats.miss()
+            response = view(request, *args, **kwargs)
+            pending = getattr(request, 'thumbnails_pending', False)
+            if response.status_code == 200 and not pending:
+                cache.set(key, response, PAGE_CACHE_TTL)
+            return response
+        return wrapper
+    return decorator
+
+
+def post_feed(post_id):
+    """Лента автора поста: её версия меняется вместе со страницей поста."""
+    username = Post.objects.filter(pk=post_id).values_list(
+        'author__username', flat=True).first()
+    if username is None:
+        return None
+    return f'profile:{username}'
+
+
+def conditional_feed(feed):
+    """Отвечает 304 на If-None-Match / If-Modified-Since без отрисовки.
+
+    ETag собирается из версий ленты, адреса с параметрами страницы
+    и пользователя, Last-Modified — из времени последней правки ленты
+    и отдаётся только анонимам. feed — шаблон имени ленты, как
+    в cache_anonymous_page, или функция от аргументов view.
+    """
+    def feed_name(request, kwargs):
+        if not hasattr(request, '_conditional_feed'):
+            request._conditional_feed = (
+                feed(**kwargs) if callable(feed) else feed.format(**kwargs))
+        return request._conditional_feed
+
+    def etag(request, *args, **kwargs):
+        name = feed_name(request, kwargs)
+        if name is None:
+            return None
+        versions = get_versions([
+            feed_version_key(SITE_FEED), feed_version_key(name)])
+        user = request.user.pk if request.user.is_authenticated else ''
+        raw = f'{versions}:{user}:{request.get_full_path()}'
+        return hashlib.md5(raw.encode()).hexdigest()
+
+    def last_modified(request, *args, **kwargs):
+        name = feed_name(request, kwargs)
+        if name is None or request.user.is_authenticated:
+            return None
+        keys = [feed_changed_key(SITE_FEED), feed_changed_key(name)]
+        changed = cache.get_many(keys)
+        # Время правки, потерянное вместе с кэшем, считается текущим
+        for key in keys:
+            if key not in changed:
+                cache.add(key, time.time(), None)
+                changed[key] = cache.get(key)
+        return datetime.datetime.fromtimestamp(
+            max(changed.values()), tz=datetime.timezone.utc)
+
+    return condition(etag_func=etag, last_modified_func=last_modified)
@@ -0,0 +1,228 @@
+import base64
+import binascii
+import hashlib
+
+from django.core.cache import cache
+from django.core.paginator import EmptyPage
+from django.core.paginator import InvalidPage
+from django.core.paginator import PageNotAnInteger
+from django.core.paginator import Page
+from django.core.paginator import Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from django.utils.functional import cached_property
+
+from posts.settings import POSTS_COUNT_STRATEGY
+from posts.settings import POSTS_COUNT_TTL
+
+# Направления перехода, зашитые в курсор
+FORWARD = 'n'
+BACKWARD = 'p'
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+def pack_token(*parts):
+    """Склеивает части ключа в непрозрачный токен для адреса."""
+    raw = '|'.join(str(part) for part in parts)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def unpack_token(token, size):
+    """Разбирает токен обратно на size строковых частей."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        parts = raw.decode().split('|')
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor('Некорректный курсор')
+    if len(parts) != size:
+        raise InvalidCursor('Некорректный курсор')
+    return parts
+
+
+def encode_cursor(direction, post):
+    """Упаковывает ключ (pub_date, id) поста в непрозрачный токен."""
+    return pack_token(direction, post.pub_date.isoformat(), post.pk)
+
+
+def decode_cursor(token):
+    """Распаковывает токен в (направление, pub_date, id)."""
+    direction, pub_date, pk = unpack_token(token, 3)
+    try:
+        pub_date = parse_datetime(pub_date)
+        pk = int(pk)
+    except ValueError:
+        raise InvalidCursor('Некорректный курсор')
+    if direction not in (FORWARD, BACKWARD) or pub_date is None:
+        raise InvalidCursor('Некорректный курсор')
+    return direction, pub_date, pk
+
+
+def after_key(queryset, direction, key, id_field='id'):
+    """Строки после ключа (pub_date, id): вперёд — по убыванию ключа,
+    назад — по возрастанию."""
+    if direction == FORWARD:
+        queryset = queryset.order_by('-pub_date', f'-{id_field}')
+        if key is None:
+            return queryset
+        pub_date, pk = key
+        return queryset.filter(
+            Q(pub_date__lt=pub_date)
+            | Q(pub_date=pub_date, **{f'{id_field}__lt': pk}))
+    pub_date, pk = key
+    return queryset.order_by('pub_date', id_field).filter(
+        Q(pub_date__gt=pub_date)
+        | Q(pub_date=pub_date, **{f'{id_field}__gt': pk}))
+
+
+class CursorPage(Page):
+    """Страница ленты, которая не знает своего номера и общего числа."""
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        super().__init__(object_list, None, paginator)
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    @property
+    def next_cursor(self):
+        if not self._has_next or not self.object_list:
+            return None
+        return encode_cursor(FORWARD, self.object_list[-1])
+
+    @property
+    def previous_cursor(self):
+        if not self._has_previous or not self.object_list:
+            return None
+        return encode_cursor(BACKWARD, self.object_list[0])
+
+
+class CursorPaginator(Paginator):
+    """Постраничный вывод по ключу (pub_date, id) без COUNT и OFFSET.
+
+    Любая страница выбирается одним запросом вида
+    WHERE (pub_date, id) < ключа ORDER BY pub_date DESC, id DESC LIMIT n+1,
+    поэтому глубокие страницы стоят столько же, сколько первая.
+    """
+    is_keyset = True
+
+    def page(self, cursor=None):
+        if not cursor:
+            return self._forward_page(None)
+        direction, pub_date, pk = decode_cursor(cursor)
+        if direction == FORWARD:
+            return self._forward_page((pub_date, pk))
+        return self._backward_page((pub_date, pk))
+
+    def get_page(self, cursor=None):
+        try:
+            return self.page(cursor)
+        except InvalidCursor:
+            return self.page(None)
+
+    def query(self, direction, key=None):
+        """Запрос строк после ключа (pub_date, id) в заданном направлении."""
+        return after_key(self.object_list, direction, key)
+
+    def rows(self, direction, key, limit):
+        """До limit постов после ключа в порядке направления."""
+        return list(self.query(direction, key)[:limit])
+
+    def _forward_page(self, key):
+        rows = self.rows(FORWARD, key, self.per_page + 1)
+        return CursorPage(
+            rows[:self.per_page],
+            self,
+            has_next=len(rows) > self.per_page,
+            has_previous=key is not None)
+
+    def _backward_page(self, key):
+        rows = self.rows(BACKWARD, key, self.per_page + 1)
+        if not rows:
+            return self._forward_page(None)
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        return CursorPage(
+            rows,
+            self,
+            has_next=True,
+            has_previous=has_previous)
+
+
+class CachedCountPaginator(Paginator):
+    """Паджинатор, который берёт COUNT(*) из кэша."""
+
+    @cached_property
+    def count(self):
+        query = str(self.object_list.query).encode()
+        key = 'posts:count:' + hashlib.md5(query).hexdigest()
+        return cache.get_or_set(key, self.object_list.count, POSTS_COUNT_TTL)
+
+
+class ProbePage(Page):
+    def __init__(self, object_list, number, paginator, has_next):
+        super().__init__(object_list, number, paginator)
+        self._has_next = has_next
+
+    def has_next(self):
+        return self._has_next
+
+    def next_page_number(self):
+        return self.number + 1
+
+
+class ProbePaginator(Paginator):
+    """Паджинатор по номерам страниц, которому не нужно общее число.
+
+    Вместо COUNT(*) страница выбирается с одним лишним постом:
+    если он нашёлся, следующая страница есть.
+    """
+    has_total = False
+
+    def validate_number(self, number):
+        try:
+            number = int(number)
+        except (TypeError, ValueError):
+            raise PageNotAnInteger('Номер страницы не целое число')
+        if number < 1:
+            raise EmptyPage('Номер страницы меньше 1')
+        return number
+
+    def page(self, number):
+        number = self.validate_number(number)
+        bottom = (number - 1) * self.per_page
+        rows = list(self.object_list[bottom:bottom + self.per_page + 1])
+        if not rows and number > 1:
+            raise EmptyPage('На этой странице нет результатов')
+        return ProbePage(rows[:self.per_page], number, self,
+                         has_next=len(rows) > self.per_page)
+
+    def get_page(self, number):
+        try:
+            return self.page(number)
+        except InvalidPage:
+            return self.page(1)
+
+
+def number_paginator(object_list, per_page, count=None):
+    """Паджинатор для ?page=N согласно POSTS_COUNT_STRATEGY."""
+    if count is not None:
+        paginator = Paginator(object_list, per_page)
+        # Известное заранее число постов избавляет от COUNT(*)
+        paginator.count = count
+        return paginator
+    if POSTS_COUNT_STRATEGY == 'probe':
+        return ProbePaginator(object_list, per_page)
+    if POSTS_COUNT_STRATEGY == 'cached':
+        return CachedCountPaginator(object_list, per_page)
+    return Paginator(object_list, per_page)
@@ -0,0 +1,186 @@
+import re
+
+from django.db import connection
+from django.db.models.expressions import RawSQL
+
+from posts.models import Post
+from posts.paginator import InvalidCursor
+from posts.paginator import pack_token
+from posts.paginator import unpack_token
+from posts.settings import SEARCH_FALLBACK_LIMIT
+
+FTS_TABLE = 'posts_post_fts'
+
+# Индекс FTS5 с внешним содержимым: текст хранится в posts_post,
+# триггеры держат индекс в согласии с ним при любых INSERT/UPDATE/DELETE,
+# в том числе при bulk_create и массовых UPDATE
+FTS_SCHEMA = [
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    f"text, content='posts_post', content_rowid='id')",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}(rowid, text) "
+    f"VALUES (new.id, new.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); END",
+    f"CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_au "
+    f"AFTER UPDATE OF text ON posts_post "
+    f"BEGIN INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, text) "
+    f"VALUES ('delete', old.id, old.text); "
+    f"INSERT INTO {FTS_TABLE}(rowid, text) VALUES (new.id, new.text); END",
+]
+FTS_REBUILD = f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')"
+FTS_DROP = [
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ai',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_ad',
+    f'DROP TRIGGER IF EXISTS {FTS_TABLE}_au',
+    f'DROP TABLE IF EXISTS {FTS_TABLE}',
+]
+
+
+def fts5_supported(connection):
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA compile_options')
+        options = {row[0] for row in cursor.fetchall()}
+    if 'ENABLE_FTS5' in options:
+        return True
+    # Сборки с FTS5 в виде встроенного расширения не всегда его отмечают
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'CREATE VIRTUAL TABLE temp.fts5_probe USING fts5(x)')
+            cursor.execute('DROP TABLE temp.fts5_probe')
+    except Exception:
+        return False
+    return True
+
+
+def install_index(connection):
+    """Создаёт индекс и триггеры и заполняет индекс текущими постами."""
+    with connection.cursor() as cursor:
+        for statement in FTS_SCHEMA:
+            cursor.execute(statement)
+        cursor.execute(FTS_REBUILD)
+
+
+def drop_index(connection):
+    with connection.cursor() as cursor:
+        for statement in FTS_DROP:
+            cursor.execute(statement)
+
+
+def has_index():
+    if connection.vendor != 'sqlite':
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [FTS_TABLE])
+        return cursor.fetchone() is not None
+
+
+def terms(query):
+    return re.findall(r'\w+', query.lower())
+
+
+def match_expression(words):
+    # Каждое слово в кавычках: операторы FTS5 из запроса не исполняются
+    return ' '.join('"{}"'.format(word) for word in words)
+
+
+class SearchPage:
+    """Страница результатов поиска с курсором на следующую."""
+
+    def __init__(self, posts, next_key):
+        self.object_list = posts
+        self.next_cursor = pack_token(*next_key) if next_key else None
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+
+def decode_search_cursor(cursor):
+    score, pk = unpack_token(cursor, 2)
+    try:
+        return float(score), int(pk)
+    except ValueError:
+        raise InvalidCursor('Некорректный курсор')
+
+
+def fts_ranked_ids(words, after, limit):
+    """Пары (оценка, id) по возрастанию bm25, то есть от лучших к худшим."""
+    sql = (
+        f'SELECT id, score FROM ('
+        f'SELECT rowid AS id, bm25({FTS_TABLE}) AS score FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s)')
+    params = [match_expression(words)]
+    if after is not None:
+        sql += ' WHERE score > %s OR (score = %s AND id > %s)'
+        params += [after[0], after[0], after[1]]
+    sql += ' ORDER BY score, id LIMIT %s'
+    params.append(limit)
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(score, pk) for pk, score in cursor.fetchall()]
+
+
+def python_ranked_ids(words, after, limit):
+    """Запасной поиск без FTS5: отбор в БД, ранжирование в Python.
+
+    Оценка — минус число вхождений слов, чтобы порядок совпадал с bm25,
+    где меньшее значение означает лучшее совпадение. На SQLite LIKE
+    не сравнивает кириллицу без учёта регистра.
+    """
+    posts = Post.objects.order_by()
+    for word in words:
+        posts = posts.filter(text__icontains=word)
+    ranked = sorted(
+        (-float(sum(text.lower().count(word) for word in words)), pk)
+        for pk, text in posts.values_list(
+            'pk', 'text')[:SEARCH_FALLBACK_LIMIT])
+    if after is not None:
+        ranked = [key for key in ranked if key > after]
+    return ranked[:limit]
+
+
+def search_posts(query, cursor=None, per_page=10):
+    """Ищет посты по словам запроса, лучшие совпадения первыми."""
+    words = terms(query)
+    if not words:
+        return SearchPage([], None)
+    try:
+        after = decode_search_cursor(cursor) if cursor else None
+    except InvalidCursor:
+        after = None
+    ranked_ids = fts_ranked_ids if has_index() else python_ranked_ids
+    keys = ranked_ids(words, after, per_page + 1)
+    page_keys = keys[:per_page]
+    posts = Post.objects.feed().in_bulk([pk for _, pk in page_keys])
+    next_key = page_keys[-1] if len(keys) > per_page else None
+    return SearchPage(
+        [posts[pk] for _, pk in page_keys if pk in posts], next_key)
+
+
+def filter_by_search(queryset, query):
+    """Оставляет в queryset посты, подходящие под запрос."""
+    words = terms(query)
+    if not words:
+        return queryset
+    if not has_index():
+        for word in words:
+            queryset = queryset.filter(text__icontains=word)
+        return queryset
+    return queryset.filter(pk__in=RawSQL(
+        f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s',
+        [match_expression(words)]))
@@ -0,0 +1,277 @@
+import collections
+import contextlib
+import datetime
+import io
+import itertools
+import math
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db import transaction
+from django.utils import timezone
+from PIL import Image
+
+from posts import search
+from posts.bulk import batches
+from posts.counters import recount_authors
+from posts.counters import recount_groups
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+from posts.page_cache import SITE_FEED
+from posts.page_cache import bump_feeds
+from posts.uploads import store_image
+
+SYLLABLES = (
+    'ба ва га да ка ла ма на па ра са та ко ло мо но по ро со то '
+    'ки ли ми ни пи ри си ти ку лу му ну пу ру су ту'
+).split()
+
+# Доля постов вне групп
+UNGROUPED_SHARE = 0.3
+
+# Относительная активность по часам суток: ночью пишут реже
+HOUR_WEIGHTS = (
+    2, 1, 1, 1, 1, 2, 3, 5, 7, 8, 8, 8,
+    9, 9, 8, 8, 8, 9, 10, 11, 11, 10, 7, 4,
+)
+
+# Сколько постов создаёт одна задача рабочего процесса
+CHUNK_SIZE = 20_000
+
+# Сколько задач на процесс держать в работе: готовые пачки ждут
+# вставки в памяти, поэтому очередь ограничена
+TASKS_PER_WORKER = 2
+
+# Данные, общие для всех задач рабочего процесса
+_shared = {}
+
+
+def make_dictionary(rnd, size):
+    words = set()
+    while len(words) < size:
+        words.add(''.join(rnd.choices(SYLLABLES, k=rnd.randint(2, 4))))
+    return sorted(words)
+
+
+def zipf_weights(size):
+    """Накопленные веса по закону Ципфа: первый встречается чаще всех."""
+    return list(itertools.accumulate(
+        1 / rank for rank in range(1, size + 1)))
+
+
+def init_shared(seed, author_ids, group_ids, images, now, days):
+    rnd = random.Random(seed)
+    dictionary = make_dictionary(rnd, 5000)
+    _shared.update(
+        seed=seed,
+        author_ids=author_ids,
+        author_weights=zipf_weights(len(author_ids)),
+        group_ids=group_ids,
+        group_weights=zipf_weights(len(group_ids)),
+        images=images,
+        image_weights=zipf_weights(len(images)),
+        dictionary=dictionary,
+        word_weights=zipf_weights(len(dictionary)),
+        now=now,
+        days=days,
+    )
+
+
+def pub_date(rnd, now, days):
+    # Плотность постов растёт к настоящему: сайт набирает аудиторию
+    age = days * (1 - math.sqrt(rnd.random()))
+    day = now - datetime.timedelta(days=math.floor(age))
+    hour = rnd.choices(range(24), weights=HOUR_WEIGHTS)[0]
+    moment = day.replace(
+        hour=hour, minute=rnd.randrange(60), second=rnd.randrange(60),
+        microsecond=rnd.randrange(1_000_000))
+    if moment > now:
+        moment -= datetime.timedelta(days=1)
+    return moment
+
+
+def generate_chunk(task):
+    """Строки постов одной задачи: (text, pub_date, author_id,
+    group_id, image). Зависят только от зерна и номера задачи."""
+    number, size, image_share = task
+    shared = _shared
+    rnd = random.Random(f'{shared["seed"]}:{number}')
+    rows = []
+    for _ in range(size):
+        group_id = None
+        if rnd.random() >= UNGROUPED_SHARE:
+            group_id = rnd.choices(
+                shared['group_ids'], cum_weights=shared['group_weights'])[0]
+        image = ''
+        if shared['images'] and rnd.random() < image_share:
+            image = rnd.choices(
+                shared['images'], cum_weights=shared['image_weights'])[0]
+        rows.append((
+            ' '.join(rnd.choices(
+                shared['dictionary'], cum_weights=shared['word_weights'],
+                k=rnd.randint(5, 60))),
+            pub_date(rnd, shared['now'], shared['days']),
+            rnd.choices(
+                shared['author_ids'], cum_weights=shared['author_weights'])[0],
+            group_id,
+            image,
+        ))
+    return rows
+
+
+def make_images(rnd, count):
+    """Набор небольших картинок в хранилище; имена по содержимому."""
+    names = []
+    for _ in range(count):
+        buffer = io.BytesIO()
+        Image.new(
+            'RGB', (rnd.randint(400, 1600), rnd.randint(300, 1200)),
+            tuple(rnd.randrange(256) for _ in range(3))).save(buffer, 'JPEG')
+        names.append(store_image(
+            SimpleUploadedFile('seed.jpg', buffer.getvalue()), 'JPEG'))
+    return names
+
+
+def create_owners(users, groups, prefix):
+    for batch in batches(range(users), 10_000):
+        User.objects.bulk_create(
+            User(username=f'{prefix}_user_{number}', password='!')
+            for number in batch)
+    for batch in batches(range(groups), 10_000):
+        Group.objects.bulk_create(
+            Group(title=f'Группа {number}', slug=f'{prefix}-group-{number}')
+            for number in batch)
+    author_ids = list(User.objects.filter(
+        username__startswith=f'{prefix}_user_').order_by('pk').values_list(
+        'pk', flat=True))
+    group_ids = list(Group.objects.filter(
+        slug__startswith=f'{prefix}-group-').order_by('pk').values_list(
+        'pk', flat=True))
+    return author_ids, group_ids
+
+
+@contextlib.contextmanager
+def without_post_indexes():
+    """Снимает индексы постов на время загрузки и строит их заново.
+
+    Построить индекс по готовой таблице во много раз быстрее, чем
+    вставлять в него строки вразброс по датам. Умеет только SQLite,
+    на других базах индексы остаются на месте.
+    """
+    if connection.vendor != 'sqlite':
+        yield
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'index' "
+            "AND tbl_name = %s AND sql IS NOT NULL",
+            [Post._meta.db_table])
+        indexes = cursor.fetchall()
+        for name, _ in indexes:
+            cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+    try:
+        yield
+    finally:
+        with connection.cursor() as cursor:
+            for _, sql in indexes:
+                cursor.execute(sql)
+            cursor.execute('ANALYZE')
+
+
+@contextlib.contextmanager
+def without_search_index():
+    """Снимает индекс поиска на время загрузки и строит его заново.
+
+    Индекс дешевле перестроить целиком, чем вести построчно триггерами.
+    """
+    if not search.has_index():
+        yield
+        return
+    search.drop_index(connection)
+    try:
+        yield
+    finally:
+        search.install_index(connection)
+
+
+def bounded_map(pool, function, tasks, window):
+    """Как pool.map, но в работе не больше window задач.
+
+    Executor.map отправляет все задачи сразу, а процессы создают посты
+    быстрее, чем идёт вставка: готовые пачки копились бы в памяти.
+    Результаты отдаются в порядке задач.
+    """
+    tasks = iter(tasks)
+    pending = collections.deque(
+        pool.submit(function, task)
+        for task in itertools.islice(tasks, window))
+    while pending:
+        rows = pending.popleft().result()
+        # Следующая задача уходит до вставки, чтобы процессы не простаивали
+        for task in itertools.islice(tasks, 1):
+            pending.append(pool.submit(function, task))
+        yield rows
+
+
+def insert_rows(rows):
+    table = connection.ops.quote_name(Post._meta.db_table)
+    adapt = connection.ops.adapt_datetimefield_value
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {table} (text, pub_date, author_id, group_id, '
+            f'image) VALUES (%s, %s, %s, %s, %s)',
+            [(text, adapt(date), author_id, group_id, image)
+             for text, date, author_id, group_id, image in rows])
+
+
+def seed_posts(posts, seed=0, users=None, groups=None, days=365, end=None,
+               images=0, image_share=0.0, workers=0, progress=None):
+    """Заполняет базу авторами, группами и постами.
+
+    Число постов на автора, на группу и картинку распределено по Ципфу,
+    даты чаще ближе к end (по умолчанию — сейчас) и днём. Посты
+    создаются задачами по CHUNK_SIZE в workers процессах и вставляются
+    в порядке задач, так что при одном зерне и end база получается
+    одинаковой.
+    """
+    rnd = random.Random(seed)
+    prefix = f'seed{seed}'
+    author_ids, group_ids = create_owners(
+        users or max(1, posts // 100), groups or max(1, posts // 1000),
+        prefix)
+    image_names = make_images(rnd, images)
+    now = end or timezone.now()
+    tasks = [
+        (number, min(CHUNK_SIZE, posts - start), image_share)
+        for number, start in enumerate(range(0, posts, CHUNK_SIZE))
+    ]
+    shared = (seed, author_ids, group_ids, image_names, now, days)
+    if workers:
+        pool = ProcessPoolExecutor(
+            max_workers=workers, initializer=init_shared, initargs=shared)
+        chunks = bounded_map(
+            pool, generate_chunk, tasks, workers * TASKS_PER_WORKER)
+    else:
+        pool = None
+        init_shared(*shared)
+        chunks = map(generate_chunk, tasks)
+    try:
+        done = 0
+        with without_search_index(), without_post_indexes():
+            for rows in chunks:
+                insert_rows(rows)
+                done += len(rows)
+                if progress is not None:
+                    progress(done)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+    for ids in batches(group_ids, 1000):
+        recount_groups(ids)
+    for ids in batches(author_ids, 1000):
+        recount_authors(ids)
+    bump_feeds([SITE_FEED])
+    return author_ids, group_ids
@@ -1,2 +1,67 @@
+from django.conf import settings
+
 # Кол-во постов на страницу
 POSTS_PER_PAGE = 10
+
+# Как паджинатор по номерам страниц (?page=N) узнаёт число постов:
+# 'exact' — COUNT(*) на каждый запрос,
+# 'cached' — COUNT(*) из кэша, обновляется раз в POSTS_COUNT_TTL секунд,
+# 'probe' — без общего числа: выбирается на один пост больше страницы,
+# чтобы понять, есть ли следующая.
+# Ленты групп и авторов берут число из хранимых счётчиков в любом режиме.
+# По умолчанию точный режим: с 'cached' общее число отстаёт до
+# POSTS_COUNT_TTL секунд, и последняя страница может быть неполной.
+# Развёртывание включает другой режим настройкой проекта с тем же именем
+POSTS_COUNT_STRATEGY = getattr(settings, 'POSTS_COUNT_STRATEGY', 'exact')
+POSTS_COUNT_TTL = 60
+
+# Сколько секунд хранится отрисованная карточка поста
+POST_CARD_CACHE_TTL = 60 * 60
+
+# Сколько секунд хранится страница ленты для анонимных посетителей;
+# новые посты сбрасывают её раньше через версию ленты
+PAGE_CACHE_TTL = 60 * 5
+
+# Сколько совпадений ранжирует запасной поиск без FTS5
+SEARCH_FALLBACK_LIMIT = 1000
+
+# Рабочие процессы, которые создают миниатюры загруженных картинок;
+# 0 — создавать в текущем процессе сразу после сохранения поста
+THUMBNAIL_WORKERS = 2
+
+# Рабочие процессы, которые раскладывают новые посты по лентам
+# подписчиков; 0 — раскладывать в текущем процессе после коммита
+FANOUT_WORKERS = 2
+
+# Автор с большим числом подписчиков не раскладывает посты по их лентам:
+# его посты подмешиваются в ленту при чтении
+FANOUT_MAX_FOLLOWERS = 10_000
+
+# Сколько последних постов автора попадает в ленту при подписке
+FOLLOW_BACKFILL_POSTS = 100
+
+# Сколько записей лент вставляется за один запрос
+FANOUT_BATCH_SIZE = 1000
+
+# Сколько записей хранилища sorl-thumbnail держит память процесса
+# и сколько секунд запись считается свежей
+THUMBNAIL_LRU_SIZE = 2000
+THUMBNAIL_LRU_TTL = 60 * 5
+
+# Наибольший размер загружаемой картинки в байтах
+IMAGE_UPLOAD_MAX_SIZE = 5 * 2 ** 20
+
+# Наибольшее число пикселей картинки: больше — похоже на бомбу
+# декомпрессии, такие файлы отклоняются до распаковки
+IMAGE_MAX_PIXELS = 25_000_000
+
+# Принимаемые форматы и расширения, под которыми они хранятся
+IMAGE_FORMATS = {
+    'JPEG': '.jpg',
+    'PNG': '.png',
+    'GIF': '.gif',
+    'WEBP': '.webp',
+}
+
+# Наибольшее число постов на странице JSON API (?limit=)
+API_MAX_PAGE_SIZE = 100
@@ -0,0 +1,150 @@
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.db.models.signals import pre_save
+from django.dispatch import receiver
+
+from posts.counters import shift_author
+from posts.counters import shift_group
+from posts import timelines
+from posts.fragments import bump_version
+from posts.models import Follow
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+from posts.page_cache import SITE_FEED
+from posts.page_cache import bump_feeds
+from posts.page_cache import post_feeds
+from posts.page_cache import profile_feeds
+from posts.thumbnails import forget
+from posts.thumbnails import schedule
+
+
+@receiver(pre_save, sender=Post)
+def remember_counted_owners(sender, instance, raw, **kwargs):
+    """Запоминает автора, группу и картинку поста до сохранения."""
+    instance._counted_owners = None
+    instance._previous_image = None
+    if raw or instance.pk is None:
+        return
+    previous = Post.objects.filter(pk=instance.pk).values_list(
+        'author_id', 'group_id', 'image').first()
+    if previous is not None:
+        instance._counted_owners = previous[:2]
+        instance._previous_image = previous[2]
+
+
+@receiver(post_save, sender=Post)
+def count_saved_post(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    old = getattr(instance, '_counted_owners', None)
+    if created or old is None:
+        shift_author(instance.author_id, 1)
+        shift_group(instance.group_id, 1)
+        return
+    old_author_id, old_group_id = old
+    if old_author_id != instance.author_id:
+        shift_author(old_author_id, -1)
+        shift_author(instance.author_id, 1)
+    if old_group_id != instance.group_id:
+        shift_group(old_group_id, -1)
+        shift_group(instance.group_id, 1)
+
+
+@receiver(post_delete, sender=Post)
+def count_deleted_post(sender, instance, **kwargs):
+    # При удалении автора каскадом его счётчик удаляется вместе с ним,
+    # при удалении группы посты теряют group_id через SET_NULL
+    shift_author(instance.author_id, -1)
+    shift_group(instance.group_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_card(sender, instance, **kwargs):
+    bump_version('post', instance.pk)
+
+
+@receiver(post_save, sender=User)
+def invalidate_author_cards(sender, instance, update_fields, **kwargs):
+    # Вход на сайт сохраняет только last_login — карточки не меняются
+    if update_fields and set(update_fields) <= {'last_login'}:
+        return
+    bump_version('author', instance.pk)
+
+
+@receiver(post_save, sender=Group)
+def invalidate_group_cards(sender, instance, **kwargs):
+    bump_version('group', instance.pk)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_feeds(sender, instance, **kwargs):
+    old = getattr(instance, '_counted_owners', None) or (None, None)
+    bump_feeds(post_feeds(
+        {instance.author_id, old[0]}, {instance.group_id, old[1]}))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Group)
+def invalidate_all_feeds(sender, instance, created, update_fields, **kwargs):
+    # Имя автора и название группы видны во многих лентах сразу
+    if created or (update_fields and set(update_fields) <= {'last_login'}):
+        return
+    bump_feeds([SITE_FEED])
+
+
+@receiver(post_delete, sender=User)
+@receiver(post_delete, sender=Group)
+def invalidate_feeds_on_delete(sender, instance, **kwargs):
+    bump_feeds([SITE_FEED])
+
+
+@receiver(post_save, sender=Post)
+def pregenerate_thumbnails(sender, instance, raw, **kwargs):
+    # Миниатюры новой картинки создаются в фоне, а не первым зрителем
+    if raw or not instance.image:
+        return
+    if instance.image.name != getattr(instance, '_previous_image', None):
+        schedule(instance.image.name)
+
+
+@receiver(post_save, sender=Post)
+def forget_replaced_image(sender, instance, raw, **kwargs):
+    # Записи о заменённой картинке иначе жили бы в LRU и кэше sorl
+    previous = getattr(instance, '_previous_image', None)
+    if raw or not previous or previous == instance.image.name:
+        return
+    forget(previous)
+
+
+@receiver(post_save, sender=Post)
+def fan_out_post(sender, instance, created, raw, **kwargs):
+    # Новый пост раскладывается по лентам подписчиков в фоне
+    if raw:
+        return
+    if created:
+        timelines.schedule_new(instance)
+        return
+    old = getattr(instance, '_counted_owners', None)
+    if old is not None and old[0] != instance.author_id:
+        timelines.reassign(instance.pk)
+
+
+@receiver(post_save, sender=Follow)
+def add_follower(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        timelines.follow_added(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def remove_follower(sender, instance, **kwargs):
+    timelines.follow_removed(instance)
+
+
+@receiver(post_save, sender=Follow)
+@receiver(post_delete, sender=Follow)
+def invalidate_followed_profile(sender, instance, **kwargs):
+    # Кнопка подписки и число подписчиков — часть страницы автора
+    bump_feeds(profile_feeds([instance.author_id]))
@@ -0,0 +1,42 @@
+from django import template
+
+from posts.fragments import get_card
+
+register = template.Library()
+
+
+class PostCardNode(template.Node):
+    def __init__(self, nodelist, name, post):
+        self.nodelist = nodelist
+        self.name = name
+        self.post = post
+
+    def render(self, context):
+        return get_card(
+            self.name.resolve(context),
+            self.post.resolve(context),
+            lambda: self.render_card(context))
+
+    def render_card(self, context):
+        # Карточку с ещё не готовой миниатюрой в кэш не кладём
+        with context.push(thumbnails_pending=[]):
+            html = self.nodelist.render(context)
+            return html, not context['thumbnails_pending']
+
+
+@register.tag
+def postcard(parser, token):
+    """Кэширует разметку карточки поста.
+
+    {% postcard 'index' post %} ... {% endpostcard %}
+    """
+    bits = token.split_contents()
+    if len(bits) != 3:
+        raise template.TemplateSyntaxError(
+            f'{bits[0]} ожидает имя карточки и пост')
+    nodelist = parser.parse(('endpostcard',))
+    parser.delete_first_token()
+    return PostCardNode(
+        nodelist,
+        parser.compile_filter(bits[1]),
+        parser.compile_filter(bits[2]))
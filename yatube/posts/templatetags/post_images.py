@@ -0,0 +1,53 @@
+from django import template
+from django.utils.html import format_html
+from django.utils.html import format_html_join
+
+from posts.image_presets import MIME_TYPES
+from posts.image_presets import PRESETS
+from posts.thumbnails import ready_variants
+
+register = template.Library()
+
+
+def mark_pending(context, image):
+    pending = context.get('thumbnails_pending')
+    if pending is not None:
+        pending.append(image.name)
+    request = context.get('request')
+    if request is not None:
+        request.thumbnails_pending = True
+
+
+def srcset(variants, image_format):
+    return ', '.join(
+        f'{thumbnail.url} {width}w'
+        for variant_format, width, thumbnail in variants
+        if variant_format == image_format)
+
+
+@register.simple_tag(takes_context=True)
+def responsive_image(context, image, preset='card', css_class=''):
+    """<picture> с вариантами картинки по пресету, не дожидаясь их создания.
+
+    Пока вариантов нет, отдаётся оригинал, а страница помечается
+    как неготовая, чтобы её не положили в кэш.
+    """
+    if not image:
+        return ''
+    variants = ready_variants(image, preset)
+    if variants is None:
+        mark_pending(context, image)
+        return format_html('<img class="{}" src="{}">', css_class, image.url)
+    preset = PRESETS[preset]
+    fallback = [variant for variant in variants
+                if variant[0] == preset.fallback_format]
+    sources = format_html_join(
+        '', '<source type="{}" srcset="{}" sizes="{}">',
+        ((MIME_TYPES[image_format], srcset(variants, image_format),
+          preset.sizes)
+         for image_format in preset.formats[:-1]))
+    return format_html(
+        '<picture>{}<img class="{}" src="{}" srcset="{}" sizes="{}">'
+        '</picture>',
+        sources, css_class, fallback[-1][2].url,
+        srcset(variants, preset.fallback_format), preset.sizes)
@@ -0,0 +1,98 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+
+CHANGELIST_URL = reverse('admin:posts_post_changelist')
+GROUP_CHANGELIST_URL = reverse('admin:posts_group_changelist')
+PER_PAGE = 100
+
+
+class PostAdminChangelistTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.admin = User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='pass')
+        cls.groups = [
+            Group.objects.create(title=f'title_{i}', slug=f'slug_{i}')
+            for i in range(5)]
+        Post.objects.bulk_create(
+            Post(author=cls.admin, group=cls.groups[i % 5], text=f'post_{i}')
+            for i in range(PER_PAGE + 20))
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def get(self, data=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(CHANGELIST_URL, data or {})
+        return response, queries
+
+    def test_changelist_without_count_and_n_plus_one(self):
+        '''Проверяется, что список постов не считает строки и не плодит
+        запросы на каждую строку.'''
+        response, queries = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.context['cl'].result_list), PER_PAGE)
+        sql = [query['sql'] for query in queries]
+        self.assertFalse([q for q in sql if 'COUNT(' in q])
+        group_queries = [q for q in sql if 'FROM "posts_group"' in q]
+        self.assertEqual(len(group_queries), 1)
+
+    def test_changelist_cursor_pages(self):
+        '''Проверяется переход по курсору в списке постов.'''
+        first, _ = self.get()
+        cl = first.context['cl']
+        second, _ = self.get({'cursor': cl.cursor_page.next_cursor})
+        first_ids = {post.pk for post in cl.result_list}
+        second_ids = {post.pk for post in second.context['cl'].result_list}
+        self.assertEqual(len(second_ids), 20)
+        self.assertFalse(first_ids & second_ids)
+        self.assertContains(second, 'Первая')
+
+    def test_changelist_sorted_by_column_uses_pages(self):
+        '''Проверяется, что сортировка по колонке работает по номерам.'''
+        response, _ = self.get({'o': '1'})
+        self.assertIsNone(response.context['cl'].cursor_page)
+        self.assertEqual(len(response.context['cl'].result_list), PER_PAGE)
+
+    def test_pub_date_filter(self):
+        '''Проверяется фильтр по году публикации.'''
+        year = Post.objects.first().pub_date.year
+        response, _ = self.get({'pub': str(year)})
+        self.assertEqual(len(response.context['cl'].result_list), PER_PAGE)
+        response, _ = self.get({'pub': str(year - 1)})
+        self.assertEqual(len(response.context['cl'].result_list), 0)
+
+    def test_list_editable_saves_group(self):
+        '''Проверяется сохранение группы из списка постов.'''
+        response, _ = self.get()
+        post = response.context['cl'].result_list[0]
+        formset = response.context['cl'].formset
+        data = {
+            'form-TOTAL_FORMS': formset.total_form_count(),
+            'form-INITIAL_FORMS': formset.initial_form_count(),
+            '_save': 'Save',
+        }
+        for index, form in enumerate(formset.forms):
+            data[f'form-{index}-id'] = form.instance.pk
+            data[f'form-{index}-group'] = form.instance.group_id
+        data['form-0-group'] = self.groups[4].pk
+        self.client.post(CHANGELIST_URL, data)
+        post.refresh_from_db()
+        self.assertEqual(post.group, self.groups[4])
+
+    def test_group_changelist(self):
+        '''Проверяется список групп без полного подсчёта.'''
+        response = self.client.get(GROUP_CHANGELIST_URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['cl'].full_result_count)
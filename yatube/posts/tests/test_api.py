@@ -0,0 +1,134 @@
+import json
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client
+from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+from sorl.thumbnail import default
+
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+
+USERNAME = 'test_author'
+SLUG = 'test_slug'
+
+API_INDEX_URL = reverse('posts:api_index')
+API_GROUP_URL = reverse('posts:api_group_posts', kwargs={'slug': SLUG})
+API_PROFILE_URL = reverse('posts:api_profile', kwargs={'username': USERNAME})
+
+
+class FeedApiTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(
+            username=USERNAME, first_name='Имя', last_name='Фамилия')
+        cls.group = Group.objects.create(title='test_title', slug=SLUG)
+        for number in range(15):
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+                text=f'пост {number}')
+
+    def setUp(self):
+        # Версии лент живут в кэше и переживают откат базы
+        cache.clear()
+        self.guest_client = Client()
+
+    def get_json(self, url, **params):
+        response = self.guest_client.get(url, params)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        return response, json.loads(
+            b''.join(response.streaming_content).decode())
+
+    def test_feeds_mirror_html(self):
+        '''Проверяется, что три ленты отдают посты своих выборок.'''
+        cases = (
+            (API_INDEX_URL, Post.objects.all()),
+            (API_GROUP_URL, self.group.posts.all()),
+            (API_PROFILE_URL, self.author.posts.all()),
+        )
+        for url, posts in cases:
+            with self.subTest(url=url):
+                _, data = self.get_json(url)
+                self.assertEqual(
+                    [post['id'] for post in data['results']],
+                    list(posts.values_list('id', flat=True)[:10]))
+
+    def test_post_representation(self):
+        '''Проверяется компактное представление поста.'''
+        _, data = self.get_json(API_GROUP_URL, limit=1)
+        post = Post.objects.filter(group=self.group).first()
+        self.assertEqual(data['results'], [{
+            'id': post.pk,
+            'text': post.text,
+            'pub_date': data['results'][0]['pub_date'],
+            'author': {'username': USERNAME, 'full_name': 'Имя Фамилия'},
+            'group': SLUG,
+            'images': [],
+        }])
+
+    def test_cursor_pagination(self):
+        '''Проверяется переход по ссылкам next и previous.'''
+        _, first = self.get_json(API_INDEX_URL, limit=6)
+        self.assertIsNone(first['previous'])
+        ids = [post['id'] for post in first['results']]
+        url = first['next']
+        while url:
+            _, page = self.get_json(url)
+            ids += [post['id'] for post in page['results']]
+            url = page['next']
+        self.assertEqual(
+            ids, list(Post.objects.values_list('id', flat=True)))
+        _, back = self.get_json(page['previous'])
+        self.assertEqual(
+            [post['id'] for post in back['results']], ids[6:12])
+
+    def test_limit_capped(self):
+        '''Проверяется, что размер страницы ограничен.'''
+        with mock.patch('posts.api.API_MAX_PAGE_SIZE', 5):
+            _, data = self.get_json(API_INDEX_URL, limit=1000)
+        self.assertEqual(len(data['results']), 5)
+        _, data = self.get_json(API_INDEX_URL, limit='x')
+        self.assertEqual(len(data['results']), 10)
+
+    def test_conditional_get(self):
+        '''Проверяется ответ 304 по ETag и его смена после нового поста.'''
+        response, _ = self.get_json(API_PROFILE_URL)
+        etag = response['ETag']
+        response = self.guest_client.get(
+            API_PROFILE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        Post.objects.create(author=self.author, text='новый')
+        response = self.guest_client.get(
+            API_PROFILE_URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_query_budget(self):
+        '''Проверяется, что ленты API укладываются в бюджет запросов.'''
+        for url in (API_INDEX_URL, API_GROUP_URL, API_PROFILE_URL):
+            with self.subTest(url=url):
+                self.get_json(url)
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_images_resolved_in_view(self):
+        '''Проверяется, что миниатюры ищутся внутри view одним запросом,
+        а отдача потока не ходит в БД.'''
+        Post.objects.update(image='posts/test.png')
+        default.kvstore.local.clear()
+        response = self.guest_client.get(API_INDEX_URL)
+        with self.assertNumQueries(0):
+            data = json.loads(b''.join(response.streaming_content).decode())
+        for post in data['results']:
+            self.assertEqual(
+                post['images'], [{'url': '/media/posts/test.png'}])
+
+    def test_unknown_feed(self):
+        '''Проверяется 404 для несуществующей группы.'''
+        response = self.guest_client.get(
+            reverse('posts:api_group_posts', kwargs={'slug': 'nope'}))
+        self.assertEqual(response.status_code, 404)
@@ -0,0 +1,33 @@
+from django.test import SimpleTestCase
+
+from posts.management.commands.benchmark_views import compare
+
+METRICS = {
+    'p50_ms': 10.0, 'p90_ms': 12.0, 'p99_ms': 15.0,
+    'peak_kb': 200.0, 'queries': 3,
+}
+
+
+class BenchmarkCompareTest(SimpleTestCase):
+    def results(self, **changes):
+        return {'views': {'index': {**METRICS, **changes}}}
+
+    def test_noise_within_tolerance_ignored(self):
+        '''Проверяется, что рост времени в пределах допуска не регрессия.'''
+        self.assertEqual(
+            compare(self.results(p50_ms=11.5), self.results(), 0.2), [])
+
+    def test_regressions_reported(self):
+        '''Проверяется, что рост времени сверх допуска и любой рост числа
+        запросов считаются регрессиями.'''
+        regressions = compare(
+            self.results(p90_ms=20.0, queries=4), self.results(), 0.2)
+        self.assertEqual(len(regressions), 2)
+        self.assertTrue(regressions[0].startswith('index.p90_ms'))
+        self.assertTrue(regressions[1].startswith('index.queries'))
+
+    def test_new_view_skipped(self):
+        '''Проверяется, что view без базовых данных не сравнивается.'''
+        results = self.results()
+        results['views']['search'] = METRICS
+        self.assertEqual(compare(results, self.results(), 0.2), [])
@@ -0,0 +1,181 @@
+from django.core.cache import cache
+from django.test import Client
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.fragments import card_stats
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+from posts.tests.utils import manage_in_other_process
+from posts.tests.utils import shared_cache
+
+USERNAME = 'test_author'
+SLUG = 'test_slug'
+TEXT = 'test_text'
+
+INDEX_URL = reverse('posts:index')
+GROUP_POSTS_URL = reverse('posts:group_posts', kwargs={'slug': SLUG})
+PROFILE_URL = reverse('posts:profile', kwargs={'username': USERNAME})
+
+
+class PostCardCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=USERNAME)
+        self.group = Group.objects.create(title='test_title', slug=SLUG)
+        self.post = Post.objects.create(author=self.author,
+                                        group=self.group,
+                                        text=TEXT)
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_cards_served_from_cache(self):
+        '''Проверяется, что повторная отрисовка карточек берётся из кэша.'''
+        # Страницы целиком кэшируются только для анонимов
+        for url in (INDEX_URL, GROUP_POSTS_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                first = self.authorized_client.get(url).content
+                before = card_stats.report()
+                self.assertEqual(
+                    self.authorized_client.get(url).content, first)
+                after = card_stats.report()
+                self.assertEqual(after['hits'], before['hits'] + 1)
+                self.assertEqual(after['misses'], before['misses'])
+
+    def test_post_edit_invalidates_card(self):
+        '''Проверяется, что правка поста обновляет карточку.'''
+        self.guest_client.get(INDEX_URL)
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=[self.post.id]),
+            data={'text': 'edited_text', 'group': self.group.id})
+        self.assertContains(self.guest_client.get(INDEX_URL), 'edited_text')
+
+    def test_author_name_invalidates_card(self):
+        '''Проверяется, что смена имени автора обновляет карточку.'''
+        self.guest_client.get(INDEX_URL)
+        self.author.first_name = 'Новое'
+        self.author.save()
+        self.assertContains(self.guest_client.get(INDEX_URL), 'Новое')
+
+    def test_group_change_invalidates_card(self):
+        '''Проверяется, что правка группы обновляет карточку.'''
+        self.guest_client.get(INDEX_URL)
+        self.group.title = 'new_title'
+        self.group.save()
+        self.assertContains(self.guest_client.get(INDEX_URL), 'new_title')
+
+
+@shared_cache()
+class CacheStatsCommandTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        author = User.objects.create_user(username=USERNAME)
+        Post.objects.create(author=author, text=TEXT)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(author)
+
+    def test_command_in_other_process(self):
+        '''Проверяется, что команда в отдельном процессе видит счётчики
+        запросов веб-процесса и обнуляет их.'''
+        self.authorized_client.get(INDEX_URL)
+        self.authorized_client.get(INDEX_URL)
+        out = manage_in_other_process('cache_stats', '--reset')
+        self.assertIn(
+            'post_cards: попаданий 1, промахов 1, доля попаданий 50.0%', out)
+        self.assertEqual(card_stats.report()['hits'], 0)
+
+
+class FeedPageCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=USERNAME)
+        self.group = Group.objects.create(title='test_title', slug=SLUG)
+        self.post = Post.objects.create(author=self.author,
+                                        group=self.group,
+                                        text=TEXT)
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_anonymous_page_served_without_queries(self):
+        '''Проверяется, что повторный анонимный запрос не идёт в БД.'''
+        for url in (INDEX_URL, GROUP_POSTS_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                first = self.guest_client.get(url).content
+                with self.assertNumQueries(0):
+                    response = self.guest_client.get(url)
+                self.assertEqual(response.content, first)
+
+    def test_new_post_shows_up_immediately(self):
+        '''Проверяется, что новый пост сразу сбрасывает кэш лент.'''
+        for url in (INDEX_URL, GROUP_POSTS_URL, PROFILE_URL):
+            self.guest_client.get(url)
+        self.authorized_client.post(
+            reverse('posts:post_create'),
+            data={'text': 'new_post_text', 'group': self.group.id})
+        for url in (INDEX_URL, GROUP_POSTS_URL, PROFILE_URL):
+            with self.subTest(url=url):
+                self.assertContains(self.guest_client.get(url),
+                                    'new_post_text')
+
+    def test_authorized_page_not_cached(self):
+        '''Проверяется, что страницы авторизованных не кэшируются.'''
+        self.authorized_client.get(INDEX_URL)
+        response = self.authorized_client.get(INDEX_URL)
+        self.assertIsNotNone(response.context)
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=USERNAME)
+        self.group = Group.objects.create(title='test_title', slug=SLUG)
+        self.post = Post.objects.create(author=self.author,
+                                        group=self.group,
+                                        text=TEXT)
+        self.POST_DETAIL_URL = reverse('posts:post_detail',
+                                       args=[self.post.id])
+        self.url_list = [INDEX_URL, GROUP_POSTS_URL, PROFILE_URL,
+                         self.POST_DETAIL_URL]
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_matching_etag_returns_304(self):
+        '''Проверяется ответ 304 на совпавший If-None-Match.'''
+        for client in (self.guest_client, self.authorized_client):
+            for url in self.url_list:
+                with self.subTest(url=url, client=client):
+                    etag = client.get(url)['ETag']
+                    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                    self.assertEqual(response.status_code, 304)
+                    self.assertEqual(response.content, b'')
+
+    def test_if_modified_since_returns_304(self):
+        '''Проверяется ответ 304 анониму на If-Modified-Since.'''
+        for url in self.url_list:
+            with self.subTest(url=url):
+                last_modified = self.guest_client.get(url)['Last-Modified']
+                response = self.guest_client.get(
+                    url, HTTP_IF_MODIFIED_SINCE=last_modified)
+                self.assertEqual(response.status_code, 304)
+
+    def test_post_edit_changes_etag(self):
+        '''Проверяется, что правка поста меняет ETag лент и поста.'''
+        etags = {url: self.guest_client.get(url)['ETag']
+                 for url in self.url_list}
+        self.authorized_client.post(
+            reverse('posts:post_edit', args=[self.post.id]),
+            data={'text': 'edited_text', 'group': self.group.id})
+        for url, etag in etags.items():
+            with self.subTest(url=url):
+                response = self.guest_client.get(url,
+                                                 HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+
+    def test_etag_differs_between_users(self):
+        '''Проверяется, что аноним и автор получают разные ETag.'''
+        self.assertNotEqual(self.guest_client.get(INDEX_URL)['ETag'],
+                            self.authorized_client.get(INDEX_URL)['ETag'])
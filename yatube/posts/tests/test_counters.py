@@ -0,0 +1,68 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import Client
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import AuthorStats
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+
+USERNAME = 'test_author'
+TEXT = 'test_text'
+
+POST_CREATE_URL = reverse('posts:post_create')
+
+
+class PostCountersTest(TestCase):
+    def setUp(self):
+        self.author = User.objects.create_user(username=USERNAME)
+        self.group = Group.objects.create(title='first', slug='first')
+        self.group_new = Group.objects.create(title='second', slug='second')
+        self.post = Post.objects.create(author=self.author,
+                                        group=self.group,
+                                        text=TEXT)
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def assertCounters(self, author, group, group_new):
+        self.group.refresh_from_db()
+        self.group_new.refresh_from_db()
+        self.assertEqual(
+            AuthorStats.objects.get(author=self.author).posts_count, author)
+        self.assertEqual(self.group.posts_count, group)
+        self.assertEqual(self.group_new.posts_count, group_new)
+
+    def test_create_post_increments_counters(self):
+        '''Проверяется, что создание поста увеличивает счётчики.'''
+        self.client.post(POST_CREATE_URL,
+                         data={'text': TEXT, 'group': self.group.id})
+        self.assertCounters(2, 2, 0)
+
+    def test_edit_post_moves_group_counter(self):
+        '''Проверяется перенос поста в другую группу.'''
+        self.client.post(
+            reverse('posts:post_edit', args=[self.post.id]),
+            data={'text': TEXT, 'group': self.group_new.id})
+        self.assertCounters(1, 0, 1)
+
+    def test_delete_post_decrements_counters(self):
+        '''Проверяется, что удаление поста уменьшает счётчики.'''
+        self.post.delete()
+        self.assertCounters(0, 0, 0)
+
+    def test_delete_author_cascade_decrements_group(self):
+        '''Проверяется удаление постов каскадом вместе с автором.'''
+        self.author.delete()
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 0)
+
+    def test_recount_command_repairs_drift(self):
+        '''Проверяется, что команда recount_posts чинит рассинхрон.'''
+        # Массовые UPDATE проходят мимо сигналов
+        Post.objects.update(group=self.group_new)
+        AuthorStats.objects.all().delete()
+        call_command('recount_posts', batch_size=1, stdout=StringIO())
+        self.assertCounters(1, 0, 1)
@@ -0,0 +1,80 @@
+import csv
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+
+USERNAME = 'test_author'
+SLUG = 'test_slug'
+
+
+class ExportPostsTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(title='test_title', slug=SLUG)
+        cls.posts = [
+            Post.objects.create(
+                author=cls.author,
+                group=cls.group if number % 2 else None,
+                text=f'пост {number}')
+            for number in range(5)
+        ]
+
+    def export(self, *args, **options):
+        out, err = StringIO(), StringIO()
+        call_command('export_posts', *args, stdout=out, stderr=err,
+                     **options)
+        return out.getvalue(), err.getvalue()
+
+    def test_posts_exported_in_key_order(self):
+        '''Проверяется, что посты выгружаются по (pub_date, id) пачками.'''
+        out, err = self.export(chunk_size=2)
+        records = [json.loads(line) for line in out.splitlines()]
+        self.assertEqual(
+            [record['id'] for record in records],
+            [post.pk for post in self.posts])
+        self.assertEqual(records[1]['author'], USERNAME)
+        self.assertEqual(records[1]['group'], SLUG)
+        self.assertIsNone(records[0]['group'])
+        self.assertEqual(err.count('курсор'), 3)
+
+    def test_export_resumes_after_cursor(self):
+        '''Проверяется, что выгрузка продолжается с напечатанного курсора
+        без повторов.'''
+        _, err = self.export(chunk_size=2)
+        cursor = err.splitlines()[0].rsplit(' ', 1)[1]
+        out, _ = self.export(chunk_size=2, cursor=cursor)
+        self.assertEqual(
+            [json.loads(line)['id'] for line in out.splitlines()],
+            [post.pk for post in self.posts[2:]])
+
+    def test_filters(self):
+        '''Проверяется выгрузка постов группы в CSV.'''
+        out, _ = self.export(group=SLUG, output_format='csv')
+        rows = list(csv.DictReader(StringIO(out)))
+        self.assertEqual(
+            [int(row['id']) for row in rows],
+            [post.pk for post in self.posts if post.group_id])
+        out, _ = self.export(since='2999-01-01')
+        self.assertEqual(out, '')
+
+    def test_groups_and_users_exported(self):
+        '''Проверяется выгрузка групп и пользователей.'''
+        out, _ = self.export('groups')
+        self.assertEqual(json.loads(out)['slug'], SLUG)
+        out, _ = self.export('users')
+        record = json.loads(out)
+        self.assertEqual(record['username'], USERNAME)
+        self.assertNotIn('password', record)
+
+    def test_bad_cursor_rejected(self):
+        '''Проверяется, что битый курсор отклоняется.'''
+        with self.assertRaisesMessage(CommandError, 'Некорректный курсор'):
+            self.export(cursor='garbage')
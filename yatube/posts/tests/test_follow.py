@@ -0,0 +1,175 @@
+import datetime
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import Client
+from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from posts.bulk import insert_posts
+from posts.counters import recount_authors
+from posts.models import AuthorStats
+from posts.models import Follow
+from posts.models import Post
+from posts.models import TimelineEntry
+from posts.models import User
+from posts.settings import POSTS_PER_PAGE
+from posts.timelines import fan_out_recent
+
+FOLLOW_URL = reverse('posts:follow_index')
+
+
+def run_on_commit(callback):
+    callback()
+
+
+@mock.patch('posts.timelines.FANOUT_WORKERS', 0)
+@mock.patch('django.db.transaction.on_commit', run_on_commit)
+class FollowTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader = User.objects.create_user(username='reader')
+        cls.author = User.objects.create_user(username='author')
+        cls.other = User.objects.create_user(username='other')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def follow(self, author, client=None):
+        return (client or self.client).post(reverse(
+            'posts:profile_follow', kwargs={'username': author.username}))
+
+    def unfollow(self, author):
+        return self.client.post(reverse(
+            'posts:profile_unfollow', kwargs={'username': author.username}))
+
+    def timeline(self, user=None):
+        return list(TimelineEntry.objects.filter(
+            user=user or self.reader).values_list('post_id', flat=True))
+
+    def followers(self, author):
+        return AuthorStats.objects.get(author=author).followers_count
+
+    def feed_ids(self, url=FOLLOW_URL):
+        response = self.client.get(url)
+        return [post.pk for post in response.context['page_obj']], response
+
+    def test_follow_and_unfollow(self):
+        '''Проверяется подписка, отписка и счётчик подписчиков.'''
+        response = self.follow(self.author)
+        self.assertRedirects(response, reverse(
+            'posts:profile', kwargs={'username': self.author.username}))
+        self.follow(self.author)
+        self.assertEqual(
+            Follow.objects.filter(user=self.reader).count(), 1)
+        self.assertEqual(self.followers(self.author), 1)
+        self.unfollow(self.author)
+        self.assertFalse(Follow.objects.exists())
+        self.assertEqual(self.followers(self.author), 0)
+
+    def test_follow_restrictions(self):
+        '''Проверяется, что на себя не подписаться, а GET ничего
+        не меняет.'''
+        self.follow(self.reader)
+        response = self.client.get(reverse(
+            'posts:profile_follow', kwargs={'username': 'author'}))
+        self.assertEqual(response.status_code, 405)
+        self.assertFalse(Follow.objects.exists())
+
+    def test_fan_out_on_create(self):
+        '''Проверяется, что новый пост попадает только в ленты
+        подписчиков.'''
+        self.follow(self.author)
+        post = Post.objects.create(author=self.author, text='Новый пост')
+        self.assertEqual(self.timeline(), [post.pk])
+        self.assertEqual(self.timeline(self.other), [])
+        ids, _ = self.feed_ids()
+        self.assertEqual(ids, [post.pk])
+
+    def test_no_fan_out_without_followers(self):
+        '''Проверяется, что пост автора без подписчиков не ставит
+        раскладку в очередь.'''
+        with mock.patch('posts.timelines.submit') as submit:
+            Post.objects.create(author=self.author, text='Новый пост')
+        submit.assert_not_called()
+
+    def test_backfill_and_cleanup(self):
+        '''Проверяется, что подписка приносит недавние посты автора,
+        а отписка их убирает.'''
+        posts = [
+            Post.objects.create(author=self.author, text=f'пост {number}')
+            for number in range(3)]
+        Post.objects.create(author=self.other, text='чужой')
+        self.follow(self.author)
+        self.assertCountEqual(self.timeline(), [post.pk for post in posts])
+        self.unfollow(self.author)
+        self.assertEqual(self.timeline(), [])
+
+    def test_profile_button(self):
+        '''Проверяется, что кнопка на странице автора отражает подписку.'''
+        url = reverse('posts:profile', kwargs={'username': 'author'})
+        self.assertContains(self.client.get(url), 'Подписаться')
+        etag = self.client.get(url)['ETag']
+        self.follow(self.author)
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertContains(response, 'Отписаться')
+
+    def test_hybrid_read_path(self):
+        '''Проверяется, что посты автора без раскладки подмешиваются
+        при чтении в порядке дат, без повторов и по страницам.'''
+        other_client = Client()
+        other_client.force_login(self.other)
+        now = timezone.now()
+        Post.objects.create(author=self.author, text='разложен до порога')
+        with mock.patch('posts.timelines.FANOUT_MAX_FOLLOWERS', 1):
+            self.follow(self.other)
+            self.follow(self.author)
+            self.follow(self.author, other_client)
+            insert_posts([
+                Post(author=(self.author, self.other)[number % 2],
+                     text=f'пост {number}',
+                     pub_date=now - datetime.timedelta(minutes=number))
+                for number in range(POSTS_PER_PAGE + 3)])
+            fan_out_recent([self.author.pk, self.other.pk])
+            self.assertEqual(len(self.timeline()), 1 + 6)
+            expected = list(Post.objects.filter(
+                author__in=[self.author, self.other]).values_list(
+                'pk', flat=True))
+            first, response = self.feed_ids()
+            page = response.context['page_obj']
+            second, _ = self.feed_ids(
+                f'{FOLLOW_URL}?cursor={page.next_cursor}')
+        self.assertEqual(first + second, expected)
+
+    def test_fan_out_resumes_below_threshold(self):
+        '''Проверяется, что автор, вернувшийся под порог, раскладывает
+        недавние посты по лентам.'''
+        other_client = Client()
+        other_client.force_login(self.other)
+        with mock.patch('posts.timelines.FANOUT_MAX_FOLLOWERS', 1):
+            self.follow(self.author)
+            self.follow(self.author, other_client)
+            post = Post.objects.create(author=self.author, text='пост')
+            self.assertEqual(self.timeline(), [])
+            other_client.post(reverse(
+                'posts:profile_unfollow', kwargs={'username': 'author'}))
+        self.assertEqual(self.timeline(), [post.pk])
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_query_budget(self):
+        '''Проверяется, что лента подписок укладывается в бюджет.'''
+        self.follow(self.author)
+        Post.objects.create(author=self.author, text='пост')
+        self.client.get(FOLLOW_URL)
+
+    def test_recount(self):
+        '''Проверяется пересчёт числа подписчиков.'''
+        self.follow(self.author)
+        AuthorStats.objects.filter(author=self.author).update(
+            followers_count=5)
+        recount_authors([self.author.pk])
+        self.assertEqual(self.followers(self.author), 1)
@@ -0,0 +1,98 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import Client
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+from posts.search import search_posts
+
+USERNAME = 'test_author'
+SLUG = 'test_slug'
+
+GROUP_POSTS_URL = reverse('posts:group_posts', kwargs={'slug': SLUG})
+
+
+class ImportPostsTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=USERNAME)
+        self.group = Group.objects.create(title='test_title', slug=SLUG)
+        self.guest_client = Client()
+
+    def write(self, content, suffix):
+        handle, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(handle, 'w', encoding='utf-8') as stream:
+            stream.write(content)
+        self.addCleanup(os.remove, path)
+        return path
+
+    def import_posts(self, path, **options):
+        out = StringIO()
+        call_command('import_posts', path, stdout=out, **options)
+        return out.getvalue()
+
+    def test_jsonl_import(self):
+        '''Проверяется загрузка JSONL: даты из файла, счётчики и
+        кэш ленты группы обновлены.'''
+        # Страница ленты попадает в кэш до загрузки
+        self.guest_client.get(GROUP_POSTS_URL)
+        rows = [
+            {'text': f'импорт {number}', 'author': USERNAME, 'group': SLUG,
+             'pub_date': f'2020-01-0{number}T10:00:00'}
+            for number in range(1, 6)
+        ]
+        path = self.write(
+            '\n'.join(json.dumps(row) for row in rows), '.jsonl')
+        output = self.import_posts(path, batch_size=2)
+        self.assertIn('Готово: 5 постов', output)
+        self.assertEqual(Post.objects.count(), 5)
+        self.assertEqual(
+            Post.objects.first().pub_date.date().isoformat(), '2020-01-05')
+        self.group.refresh_from_db()
+        self.assertEqual(self.group.posts_count, 5)
+        self.assertEqual(self.author.post_stats.posts_count, 5)
+        response = self.guest_client.get(GROUP_POSTS_URL)
+        self.assertEqual(len(response.context['page_obj']), 5)
+
+    def test_csv_import_creates_authors_and_groups(self):
+        '''Проверяется загрузка CSV с заведением авторов и групп.'''
+        path = self.write(
+            'text,author,group\n'
+            'первый,new_author,new_group\n'
+            'второй,new_author,\n', '.csv')
+        self.import_posts(path, create_authors=True, create_groups=True)
+        author = User.objects.get(username='new_author')
+        self.assertFalse(author.has_usable_password())
+        self.assertEqual(author.post_stats.posts_count, 2)
+        self.assertEqual(
+            Group.objects.get(slug='new_group').posts_count, 1)
+        self.assertEqual(
+            search_posts('второй').object_list[0].author, author)
+
+    def test_rows_with_unknown_owners_skipped(self):
+        '''Проверяется, что строки с неизвестным автором или группой
+        пропускаются.'''
+        path = self.write(
+            'text,author,group\n'
+            'первый,nobody,\n'
+            'второй,test_author,nowhere\n'
+            'третий,test_author,\n', '.csv')
+        output = self.import_posts(path)
+        self.assertIn('пропущено 2', output)
+        self.assertEqual(Post.objects.get().text, 'третий')
+
+    def test_broken_jsonl_reported(self):
+        '''Проверяется, что битая строка JSONL называется по номеру.'''
+        path = self.write(
+            '{"text": "x", "author": "test_author"}\n{', '.jsonl')
+        with self.assertRaisesMessage(CommandError, 'Строка 2'):
+            self.import_posts(path)
@@ -0,0 +1,44 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.test import Client
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import User
+
+INDEX_URL = reverse('posts:index')
+LOGIN_URL = reverse('login')
+
+
+class SessionlessAuthenticationTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='test_user', password='test_password')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_anonymous_without_session(self):
+        '''Проверяется, что аноним без cookie не касается сессии,
+        а ответ по-прежнему зависит от cookie.'''
+        response = self.guest_client.get(INDEX_URL)
+        request = response.wsgi_request
+        self.assertFalse(request.user.is_authenticated)
+        self.assertFalse(request.session.accessed)
+        self.assertNotIn(settings.SESSION_COOKIE_NAME, response.cookies)
+        self.assertIn('Cookie', response['Vary'])
+        self.assertContains(response, 'Войти')
+
+    def test_login_through_fast_path(self):
+        '''Проверяется вход анонима и шапка вошедшего пользователя.'''
+        self.guest_client.get(INDEX_URL)
+        response = self.guest_client.post(
+            LOGIN_URL,
+            {'username': 'test_user', 'password': 'test_password'})
+        self.assertEqual(response.status_code, 302)
+        response = self.guest_client.get(INDEX_URL)
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+        self.assertContains(response, 'Новая запись')
+        self.assertNotContains(response, 'Войти')
@@ -3,6 +3,10 @@ from django.test import TestCase
 from posts.models import Group
 from posts.models import Post
 from posts.models import User
+from posts.paginator import BACKWARD
+from posts.paginator import FORWARD
+from posts.paginator import CursorPaginator
+from posts.settings import POSTS_PER_PAGE
 
 USERNAME = 'test_author'
 TITLE = 'test_group'
@@ -58,3 +62,34 @@ class PostModelTest(TestCase):
             with self.subTest(field=field):
                 self.assertEqual(
                     Post._meta.get_field(field).verbose_name, expected)
+
+
+class PostFeedIndexesTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.user = User.objects.create_user(username=USERNAME)
+        cls.group = Group.objects.create(title=TITLE, slug=SLUG)
+        cls.post = Post.objects.create(author=cls.user, group=cls.group,
+                                       text=DESCRIPTION)
+
+    def test_feeds_ordered_by_index(self):
+        '''Проверяется по EXPLAIN, что ленты сортируются индексом.'''
+        cases = [
+            [Post.objects.feed(), 'post_feed_idx'],
+            [self.group.posts.feed(), 'post_group_feed_idx'],
+            [self.user.posts.feed(), 'post_author_feed_idx'],
+        ]
+        key = (self.post.pub_date, self.post.pk)
+        for posts, index in cases:
+            paginator = CursorPaginator(posts, POSTS_PER_PAGE)
+            queries = [
+                paginator.query(FORWARD),
+                paginator.query(FORWARD, key),
+                paginator.query(BACKWARD, key),
+            ]
+            for query in queries:
+                with self.subTest(index=index, query=str(query.query)):
+                    plan = query[:POSTS_PER_PAGE + 1].explain()
+                    self.assertIn(f'USING INDEX {index}', plan)
+                    self.assertNotIn('TEMP B-TREE', plan)
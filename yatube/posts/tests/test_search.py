@@ -0,0 +1,72 @@
+from unittest import mock
+
+from django.contrib.admin.sites import site
+from django.core.cache import cache
+from django.test import Client
+from django.test import RequestFactory
+from django.test import TestCase
+from django.urls import reverse
+
+from posts.models import Post
+from posts.models import User
+from posts.search import has_index
+from posts.search import search_posts
+
+USERNAME = 'test_author'
+
+SEARCH_URL = reverse('posts:search')
+
+
+class PostSearchTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create_user(username=USERNAME)
+        cls.best = Post.objects.create(
+            author=cls.author, text='Кот кот кот и собака')
+        cls.good = Post.objects.create(
+            author=cls.author, text='Про кот и длинный рассказ про собаку '
+                                    'и прочие подробности дня')
+        cls.other = Post.objects.create(author=cls.author, text='Про море')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_search_index_installed(self):
+        '''Проверяется, что миграция завела индекс FTS5.'''
+        self.assertTrue(has_index())
+
+    def test_search_ranks_results(self):
+        '''Проверяется ранжирование: больше совпадений — выше в выдаче.'''
+        response = self.guest_client.get(SEARCH_URL, {'q': 'кот'})
+        self.assertEqual(list(response.context['page_obj']),
+                         [self.best, self.good])
+
+    def test_search_follows_edits(self):
+        '''Проверяется, что индекс следует за правкой и удалением.'''
+        self.other.text = 'Теперь про кота'
+        self.other.save()
+        self.assertIn(self.other, search_posts('кота'))
+        self.other.delete()
+        self.assertEqual(list(search_posts('кота')), [])
+
+    def test_search_cursor_pages(self):
+        '''Проверяется переход по курсору на следующую страницу.'''
+        for fallback in (False, True):
+            with self.subTest(fallback=fallback), mock.patch(
+                    'posts.search.has_index', return_value=not fallback):
+                first = search_posts('кот', per_page=1)
+                second = search_posts('кот', first.next_cursor, per_page=1)
+                self.assertEqual(list(first), [self.best])
+                self.assertEqual(list(second), [self.good])
+                self.assertFalse(second.has_next())
+
+    def test_admin_search_uses_index(self):
+        '''Проверяется поиск в админке через индекс.'''
+        admin = site._registry[Post]
+        request = RequestFactory().get('/admin/posts/post/')
+        queryset, distinct = admin.get_search_results(
+            request, Post.objects.all(), 'собака')
+        self.assertEqual(set(queryset), {self.best})
+        self.assertFalse(distinct)
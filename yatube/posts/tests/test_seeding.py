@@ -0,0 +1,86 @@
+import datetime
+from concurrent.futures import Future
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db.models import Sum
+from django.test import TestCase
+from django.utils import timezone
+
+from posts import search
+from posts import seeding
+from posts.models import AuthorStats
+from posts.models import Group
+from posts.models import Post
+
+END = datetime.datetime(2021, 6, 1, tzinfo=datetime.timezone.utc)
+
+
+class SeedTest(TestCase):
+    def test_bounded_map(self):
+        '''Проверяется, что в работе не больше window задач, а результаты
+        идут в порядке задач.'''
+        submitted = []
+
+        class Pool:
+            def submit(self, function, task):
+                submitted.append(task)
+                future = Future()
+                future.set_result(function(task))
+                return future
+
+        results = []
+        for result in seeding.bounded_map(Pool(), str, range(10), 3):
+            results.append(result)
+            self.assertLessEqual(len(submitted) - len(results), 3)
+        self.assertEqual(results, [str(number) for number in range(10)])
+
+    def test_chunks_deterministic(self):
+        '''Проверяется, что задача даёт одни и те же посты при одном
+        зерне и разные при разных.'''
+        seeding.init_shared(1, [1, 2, 3], [1, 2], [], END, 30)
+        first = seeding.generate_chunk((0, 50, 0))
+        self.assertEqual(seeding.generate_chunk((0, 50, 0)), first)
+        self.assertNotEqual(seeding.generate_chunk((1, 50, 0)), first)
+
+    def test_skewed_data_with_consistent_counters(self):
+        '''Проверяется, что посты распределены по Ципфу в заданном
+        интервале дат, а счётчики совпадают с числом постов.'''
+        author_ids, group_ids = seeding.seed_posts(
+            3000, seed=1, users=20, groups=5, days=30, end=END)
+        self.assertEqual(Post.objects.count(), 3000)
+        top = Post.objects.filter(author_id=author_ids[0]).count()
+        last = Post.objects.filter(author_id=author_ids[-1]).count()
+        self.assertGreater(top, last * 5)
+        dates = Post.objects.order_by('pub_date').values_list(
+            'pub_date', flat=True)
+        self.assertGreaterEqual(dates.first(), END - datetime.timedelta(31))
+        self.assertLessEqual(dates.last(), END)
+        self.assertEqual(
+            Group.objects.aggregate(total=Sum('posts_count'))['total'],
+            Post.objects.exclude(group=None).count())
+        self.assertEqual(
+            AuthorStats.objects.aggregate(total=Sum('posts_count'))['total'],
+            3000)
+
+    def test_search_index_restored_on_failure(self):
+        '''Проверяется, что индекс поиска восстанавливается, даже если
+        загрузка прервалась.'''
+        if not search.has_index():
+            self.skipTest('FTS5 недоступен')
+        with mock.patch.object(
+                seeding, 'insert_rows', side_effect=RuntimeError):
+            with self.assertRaises(RuntimeError):
+                seeding.seed_posts(10, seed=2, end=END)
+        self.assertTrue(search.has_index())
+
+    def test_seed_command(self):
+        '''Проверяется, что команда не заполняет базу тем же зерном
+        дважды.'''
+        options = {'posts': 100, 'workers': 0, 'stdout': StringIO()}
+        call_command('seed', end=timezone.now().isoformat(), **options)
+        self.assertEqual(Post.objects.count(), 100)
+        with self.assertRaises(CommandError):
+            call_command('seed', **options)
@@ -0,0 +1,50 @@
+import json
+
+from django.core.cache import cache
+from django.test import Client
+from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from posts.models import User
+
+INDEX_URL = reverse('posts:index')
+
+
+class ServerTimingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username='test_author')
+        Post.objects.create(author=cls.author, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    @override_settings(SERVER_TIMING_HEADER=True)
+    def test_header(self):
+        '''Проверяется, что ответ несёт метрики частей запроса.'''
+        response = self.guest_client.get(INDEX_URL)
+        header = response['Server-Timing']
+        for name in ('mw', 'view', 'db', 'tpl', 'cache', 'thumb', 'total'):
+            with self.subTest(name=name):
+                self.assertIn(f'{name};dur=', header)
+        self.assertRegex(header, r'desc="SQL x[1-9]\d*"')
+
+    def test_log_line(self):
+        '''Проверяется строка лога с именем маршрута и замерами.'''
+        with self.assertLogs('core.server_timing', 'INFO') as logs:
+            self.guest_client.get(INDEX_URL)
+        record = json.loads(logs.records[-1].getMessage())
+        self.assertEqual(record['url_name'], 'posts:index')
+        self.assertEqual(record['status'], 200)
+        self.assertGreater(record['queries'], 0)
+        self.assertGreaterEqual(record['total_ms'], record['view_ms'])
+
+    @override_settings(SERVER_TIMING_HEADER=False)
+    def test_header_disabled(self):
+        '''Проверяется, что заголовок можно отключить.'''
+        with self.assertLogs('core.server_timing', 'INFO'):
+            response = self.guest_client.get(INDEX_URL)
+        self.assertFalse(response.has_header('Server-Timing'))
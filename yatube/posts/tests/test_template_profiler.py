@@ -0,0 +1,87 @@
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import Client
+from django.test import TestCase
+from django.urls import reverse
+
+from core import template_profiler
+from posts.models import Group
+from posts.models import Post
+from posts.models import User
+from posts.tests.utils import manage_in_other_process
+from posts.tests.utils import shared_cache
+
+INDEX_URL = reverse('posts:index')
+
+
+class TemplateProfilerTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username='test_author')
+        group = Group.objects.create(title='test_title', slug='test_slug')
+        Post.objects.create(author=author, group=group, text='Тестовый пост')
+
+    def setUp(self):
+        cache.clear()
+        template_profiler.install()
+        self.addCleanup(template_profiler.uninstall)
+        self.guest_client = Client()
+
+    def labels(self):
+        return {row['label']: row for row in template_profiler.report()}
+
+    def test_nodes_timed(self):
+        '''Проверяется, что замеряются шаблоны, include, block и теги.'''
+        self.guest_client.get(INDEX_URL)
+        labels = self.labels()
+        expected = (
+            'posts/index.html',
+            'includes/header.html',
+            "base.html:14 {% include 'includes/header.html' %}",
+            'base.html:18 {% block content %}',
+            "posts/index.html:5 {% include 'posts/includes/post_card.html' %}",
+            "posts/includes/post_card.html:2 {% postcard 'index' post %}",
+        )
+        for label in expected:
+            with self.subTest(label=label):
+                self.assertIn(label, labels)
+        self.assertTrue(any(
+            '{% url ' in label for label in labels))
+        for row in labels.values():
+            self.assertLessEqual(row['self_ms'], row['total_ms'])
+
+    def test_aggregated_across_requests(self):
+        '''Проверяется, что замеры копятся между запросами.'''
+        self.guest_client.get(INDEX_URL)
+        self.guest_client.get(INDEX_URL, {'page': 2})
+        self.assertEqual(self.labels()['posts/index.html']['calls'], 2)
+
+    def test_command(self):
+        '''Проверяется отчёт команды и обнуление замеров.'''
+        self.guest_client.get(INDEX_URL)
+        out = StringIO()
+        call_command(
+            'template_profile', sort='total', limit=3, reset=True,
+            stdout=out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[1].endswith('posts/index.html'))
+        self.assertEqual(template_profiler.report(), [])
+
+    @shared_cache()
+    def test_command_in_other_process(self):
+        '''Проверяется, что команда в отдельном процессе видит замеры
+        веб-процесса.'''
+        cache.clear()
+        self.guest_client.get(INDEX_URL)
+        out = manage_in_other_process('template_profile', '--sort=calls')
+        self.assertNotIn('Замеров нет.', out)
+        self.assertIn('posts/index.html', out)
+
+    def test_uninstall(self):
+        '''Проверяется, что без профилировщика замеров нет.'''
+        template_profiler.uninstall()
+        self.guest_client.get(INDEX_URL)
+        self.assertEqual(template_profiler.report(), [])
@@ -0,0 +1,184 @@
+import io
+import json
+import shutil
+import tempfile
+import time
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client
+from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+from sorl.thumbnail import default
+
+from core import cache_versions
+from posts import thumbnails
+from posts.fragments import version_key
+from posts.image_presets import PRESETS
+from posts.kvstore import LRUCache
+from posts.models import Post
+from posts.models import User
+from posts.tests.utils import read_in_other_process
+from posts.tests.utils import shared_cache
+
+USERNAME = 'test_author'
+TEXT = 'test_text'
+
+INDEX_URL = reverse('posts:index')
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def small_image(name='small.png'):
+    buffer = io.BytesIO()
+    Image.new('RGB', (4, 4), 'red').save(buffer, 'PNG')
+    return SimpleUploadedFile(name, buffer.getvalue(), 'image/png')
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.thumbnails.THUMBNAIL_WORKERS', 0)
+class ThumbnailPregenerationTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        # Кэш страниц и LRU миниатюр переживают откат базы между тестами
+        cache.clear()
+        default.kvstore.local.clear()
+        self.author = User.objects.create_user(username=USERNAME)
+        self.post = Post.objects.create(
+            author=self.author, text=TEXT, image=small_image())
+        self.guest_client = Client()
+
+    def test_new_image_is_scheduled(self):
+        '''Проверяется, что сохранение поста ставит миниатюры в очередь.'''
+        self.assertTrue(cache.get(thumbnails.queue_key(self.post.image.name)))
+
+    def test_original_served_until_thumbnail_ready(self):
+        '''Проверяется, что до создания миниатюры отдаётся оригинал,
+        а страница не попадает в кэш.'''
+        content = self.guest_client.get(INDEX_URL).content.decode()
+        self.assertIn(self.post.image.url, content)
+        Post.objects.filter(pk=self.post.pk).update(text='new_text')
+        content = self.guest_client.get(INDEX_URL).content.decode()
+        self.assertIn('new_text', content)
+
+    def test_thumbnail_served_after_generation(self):
+        '''Проверяется, что после создания миниатюры отдаётся она.'''
+        thumbnails.generate(self.post.image.name)
+        self.assertIsNone(cache.get(
+            thumbnails.queue_key(self.post.image.name)))
+        variants = thumbnails.ready_variants(self.post.image, 'card')
+        preset = PRESETS['card']
+        self.assertEqual(
+            len(variants), len(preset.widths) * len(preset.formats))
+        content = self.guest_client.get(INDEX_URL).content.decode()
+        for image_format, width, thumbnail in variants:
+            with self.subTest(image_format=image_format, width=width):
+                self.assertIn(f'{thumbnail.url} {width}w', content)
+        self.assertIn('<source type="image/webp"', content)
+        self.assertIn(f'sizes="{preset.sizes}"', content)
+        self.assertNotIn(f'src="{self.post.image.url}"', content)
+
+    @shared_cache()
+    def test_generation_seen_by_other_process(self):
+        '''Проверяется, что сброс очереди и версии карточки в generate
+        виден другим процессам: рабочий процесс делит кэш
+        с веб-процессами.'''
+        name = self.post.image.name
+        queue_key = thumbnails.queue_key(name)
+        key = version_key('post', self.post.pk)
+        cache_versions.get_versions([key])
+        thumbnails.schedule(name)
+        self.assertEqual(read_in_other_process(queue_key), 'True')
+        version = read_in_other_process(key)
+        thumbnails.generate(name)
+        self.assertEqual(read_in_other_process(queue_key), 'None')
+        self.assertNotEqual(read_in_other_process(key), version)
+
+    @override_settings(QUERY_BUDGET_MODE='raise')
+    def test_page_thumbnails_looked_up_once(self):
+        '''Проверяется, что миниатюры карточек страницы ищутся одним
+        запросом, а не запросом на пост.'''
+        for number in range(5):
+            Post.objects.create(
+                author=self.author, text=TEXT,
+                image=small_image(f'small_{number}.png'))
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(INDEX_URL)
+        self.assertEqual(response.status_code, 200)
+
+    def test_shared_upload_listed_once(self):
+        '''Проверяется, что общая картинка двух постов не удваивает
+        их варианты.'''
+        Post.objects.create(
+            author=self.author, text=TEXT, image=self.post.image.name)
+        thumbnails.generate(self.post.image.name)
+        preset = PRESETS['card']
+        response = self.guest_client.get(reverse('posts:api_index'))
+        data = json.loads(b''.join(response.streaming_content).decode())
+        self.assertEqual(len(data['results']), 2)
+        for post in data['results']:
+            self.assertEqual(
+                len(post['images']), len(preset.widths) * len(preset.formats))
+
+    def test_thumbnail_lookup_served_from_memory(self):
+        '''Проверяется, что повторный поиск миниатюры не ходит в БД
+        и кэш.'''
+        thumbnails.generate(self.post.image.name)
+        cache.clear()
+        thumbnails.ready_variants(self.post.image, 'card')
+        with self.assertNumQueries(0):
+            variants = thumbnails.ready_variants(self.post.image, 'card')
+        self.assertIsNotNone(variants)
+
+    def test_replaced_image_forgotten(self):
+        '''Проверяется, что при замене картинки её миниатюры удаляются
+        из хранилища.'''
+        old_image = self.post.image
+        thumbnails.generate(old_image.name)
+        thumbnail = thumbnails.ready_variants(old_image, 'card')[0][2]
+        self.post.image = small_image('other.png')
+        with mock.patch('django.db.transaction.on_commit',
+                        lambda callback: callback()):
+            self.post.save()
+        self.assertIsNone(thumbnails.ready_variants(old_image, 'card'))
+        self.assertFalse(default.storage.exists(thumbnail.name))
+
+    def test_regenerate_command(self):
+        '''Проверяется, что команда создаёт варианты картинок постов.'''
+        self.assertIsNone(thumbnails.ready_variants(self.post.image, 'card'))
+        out = io.StringIO()
+        call_command('regenerate_images', workers=0, stdout=out)
+        self.assertIn('Обработано картинок: 1', out.getvalue())
+        self.assertIsNotNone(
+            thumbnails.ready_variants(self.post.image, 'card'))
+
+
+class LRUCacheTest(TestCase):
+    def test_least_recently_used_evicted(self):
+        '''Проверяется, что вытесняется давно не читанная запись.'''
+        lru = LRUCache(size=2, ttl=60)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        lru.get('a')
+        lru.set('c', 3)
+        self.assertEqual(lru.get('a'), 1)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual(lru.take_counts(), (2, 1))
+
+    def test_expired_entry_dropped(self):
+        '''Проверяется, что устаревшая запись не отдаётся.'''
+        lru = LRUCache(size=2, ttl=60)
+        lru.set('a', 1)
+        with mock.patch('posts.kvstore.time.monotonic',
+                        return_value=time.monotonic() + 61):
+            self.assertIsNone(lru.get('a'))
+        self.assertEqual(len(lru), 0)
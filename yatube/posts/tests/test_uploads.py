@@ -0,0 +1,102 @@
+import hashlib
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client
+from django.test import TestCase
+from django.test import override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts.models import Post
+from posts.models import User
+
+USERNAME = 'test_author'
+TEXT = 'test_text'
+
+TEMP_MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def png_bytes(size=(4, 4)):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, 'red').save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=TEMP_MEDIA_ROOT)
+@mock.patch('posts.thumbnails.THUMBNAIL_WORKERS', 0)
+class PostImageUploadTest(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(TEMP_MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username=USERNAME)
+        self.post = Post.objects.create(author=self.author, text=TEXT)
+        self.other_post = Post.objects.create(author=self.author, text=TEXT)
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def upload(self, post, content, name='picture.png'):
+        return self.authorized_client.post(
+            reverse('posts:post_image', kwargs={'post_id': post.pk}),
+            {'image': SimpleUploadedFile(name, content, 'image/png')})
+
+    def test_image_stored_under_content_hash(self):
+        '''Проверяется, что картинка хранится под хэшем содержимого,
+        а одинаковые файлы хранятся один раз.'''
+        content = png_bytes()
+        digest = hashlib.sha256(content).hexdigest()
+        response = self.upload(self.post, content, 'one.png')
+        self.assertRedirects(response, reverse(
+            'posts:post_detail', kwargs={'post_id': self.post.pk}))
+        self.upload(self.other_post, content, 'two.PNG')
+        self.post.refresh_from_db()
+        self.other_post.refresh_from_db()
+        self.assertEqual(self.post.image.name,
+                         f'posts/{digest[:2]}/{digest}.png')
+        self.assertEqual(self.other_post.image.name, self.post.image.name)
+        self.assertEqual(
+            len(self.post.image.storage.listdir(f'posts/{digest[:2]}')[1]),
+            1)
+
+    def test_oversized_upload_rejected(self):
+        '''Проверяется, что слишком большой файл отклоняется.'''
+        content = png_bytes()
+        with mock.patch('posts.uploads.IMAGE_UPLOAD_MAX_SIZE',
+                        len(content) - 1):
+            response = self.upload(self.post, content)
+        self.assertTrue(response.context['form'].errors['image'])
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.image)
+
+    def test_decompression_bomb_rejected_before_decoding(self):
+        '''Проверяется, что картинка со слишком большим числом пикселей
+        отклоняется без распаковки.'''
+        content = png_bytes()
+        with mock.patch('posts.uploads.IMAGE_MAX_PIXELS', 10), \
+                mock.patch.object(Image.Image, 'load') as load:
+            response = self.upload(self.post, content)
+        load.assert_not_called()
+        self.assertTrue(response.context['form'].errors['image'])
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.image)
+
+    def test_not_an_image_rejected(self):
+        '''Проверяется, что файл не-картинка отклоняется.'''
+        response = self.upload(self.post, b'not an image')
+        self.assertTrue(response.context['form'].errors['image'])
+
+    def test_only_author_uploads(self):
+        '''Проверяется, что чужой пост картинку не получает.'''
+        stranger = User.objects.create_user(username='stranger')
+        self.authorized_client.force_login(stranger)
+        self.upload(self.post, png_bytes())
+        self.post.refresh_from_db()
+        self.assertFalse(self.post.image)
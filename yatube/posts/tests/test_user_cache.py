@@ -0,0 +1,114 @@
+from django.contrib.auth.models import Group
+from django.contrib.auth.models import Permission
+from django.contrib.sessions.backends.cached_db import SessionStore
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import User
+from posts.tests.utils import read_in_other_process
+from posts.tests.utils import shared_cache
+from users.backends import version_key
+
+INDEX_URL = reverse('posts:index')
+PASSWORD_CHANGE_URL = reverse('password_change')
+LOGOUT_URL = reverse('logout')
+
+
+class CachedUserTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='test_user', password='old_password')
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.login(username='test_user', password='old_password')
+
+    def queries(self, url=INDEX_URL):
+        connection.queries_log.clear()
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+        return [query['sql'] for query in queries]
+
+    def user_loaded(self, queries):
+        table = User._meta.db_table
+        return any(f'FROM "{table}"' in sql for sql in queries)
+
+    def test_no_session_and_user_queries(self):
+        '''Проверяется, что повторный запрос не читает сессию
+        и пользователя из базы.'''
+        self.client.get(INDEX_URL)
+        queries = self.queries()
+        self.assertFalse(any('django_session' in sql for sql in queries))
+        self.assertFalse(self.user_loaded(queries))
+
+    def test_invalidated_on_save(self):
+        '''Проверяется, что после смены имени пользователь читается
+        заново.'''
+        self.client.get(INDEX_URL)
+        self.user.first_name = 'Новое'
+        self.user.save()
+        self.assertTrue(self.user_loaded(self.queries()))
+        self.assertFalse(self.user_loaded(self.queries()))
+
+    def test_invalidated_on_permissions(self):
+        '''Проверяется сброс при смене прав и групп пользователя.'''
+        group = Group.objects.create(name='editors')
+        permission = Permission.objects.get(codename='change_post')
+        changes = (
+            lambda: self.user.user_permissions.add(permission),
+            lambda: self.user.groups.add(group),
+            lambda: group.permissions.add(permission),
+            lambda: permission.group_set.clear(),
+            lambda: group.user_set.clear(),
+        )
+        for change in changes:
+            self.client.get(INDEX_URL)
+            change()
+            with self.subTest(change=change):
+                self.assertTrue(self.user_loaded(self.queries()))
+
+    def test_password_change_logs_out_other_sessions(self):
+        '''Проверяется, что смена пароля по-прежнему завершает другие
+        сессии, а текущую оставляет.'''
+        other = Client()
+        other.login(username='test_user', password='old_password')
+        other.get(INDEX_URL)
+        response = self.client.post(PASSWORD_CHANGE_URL, {
+            'old_password': 'old_password',
+            'new_password1': 'new-Pa55word',
+            'new_password2': 'new-Pa55word',
+        })
+        self.assertEqual(response.status_code, 302)
+        response = other.get(INDEX_URL)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+        response = self.client.get(INDEX_URL)
+        self.assertTrue(response.wsgi_request.user.is_authenticated)
+
+    def test_logout(self):
+        '''Проверяется, что после выхода сессия из кэша не действует.'''
+        self.client.get(INDEX_URL)
+        cookie = self.client.cookies['sessionid'].value
+        self.client.get(LOGOUT_URL)
+        self.client.cookies['sessionid'] = cookie
+        response = self.client.get(INDEX_URL)
+        self.assertFalse(response.wsgi_request.user.is_authenticated)
+
+    @shared_cache()
+    def test_shared_between_processes(self):
+        '''Проверяется, что выход и правка пользователя видны другому
+        процессу: иначе он продолжал бы отдавать сессию из своего кэша.'''
+        self.client.get(INDEX_URL)
+        key = SessionStore(self.client.cookies['sessionid'].value).cache_key
+        self.assertNotEqual(read_in_other_process(key), 'None')
+        version = read_in_other_process(version_key(self.user.pk))
+        self.user.save()
+        self.assertNotEqual(
+            read_in_other_process(version_key(self.user.pk)), version)
+        self.client.get(LOGOUT_URL)
+        self.assertEqual(read_in_other_process(key), 'None')
@@ -1,10 +1,20 @@
+from unittest import mock
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import Client
+from django.test import RequestFactory
 from django.test import TestCase
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 
+from core.query_budget import QueryBudgetExceeded
+from core.query_budget import query_budget
 from posts.models import Group
 from posts.models import Post
 from posts.models import User
+from posts.paginator import CursorPaginator
 from posts.settings import POSTS_PER_PAGE
 
 
@@ -42,6 +52,8 @@ class PostPagesTests(TestCase):
         cls.POST_DETAIL_URL = reverse('posts:post_detail', args=[cls.post.id])
 
     def setUp(self):
+        # Кэш страниц переживает откат базы между тестами
+        cache.clear()
         self.guest_client = Client()
         self.authorized_client = Client()
         self.authorized_client.force_login(self.author)
@@ -105,6 +117,8 @@ class PaginatorViewsTest(TestCase):
         ]
 
     def setUp(self):
+        # Кэш страниц переживает откат базы между тестами
+        cache.clear()
         self.guest_client = Client()
 
     def test_paginator_of_first_page(self):
@@ -115,3 +129,195 @@ class PaginatorViewsTest(TestCase):
                 response.context['page_obj']),
                 POSTS_PER_PAGE
             )
+
+
+class CursorPaginatorViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username='test_author')
+        cls.group = Group.objects.create(title='test_title',
+                                         slug='test_slug',
+                                         description='test_discription')
+        # bulk_create даёт постам почти одинаковые pub_date,
+        # так что порядок внутри страниц держится на id
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=f'post_{i}')
+            for i in range(POSTS_PER_PAGE * 2 + 3)
+        )
+        cls.url_list = [
+            INDEX_URL,
+            GROUP_POSTS_URL,
+            PROFILE_URL
+        ]
+
+    def setUp(self):
+        # Кэш страниц переживает откат базы между тестами
+        cache.clear()
+        self.guest_client = Client()
+
+    def walk(self, url):
+        pages = []
+        cursor = ''
+        while cursor is not None:
+            page_obj = self.guest_client.get(
+                url, {'cursor': cursor}).context['page_obj']
+            pages.append(page_obj)
+            cursor = page_obj.next_cursor
+        return pages
+
+    def test_cursor_walk_covers_feed_once(self):
+        '''Проверяется, что переход по курсорам обходит ленту без повторов.'''
+        expected = list(
+            Post.objects.order_by('-pub_date', '-id')
+            .values_list('id', flat=True))
+        for url in self.url_list:
+            with self.subTest(url=url):
+                pages = self.walk(url)
+                ids = [post.id for page in pages for post in page]
+                self.assertEqual(ids, expected)
+                self.assertEqual(len(pages), 3)
+                self.assertFalse(pages[0].has_previous())
+                self.assertFalse(pages[-1].has_next())
+
+    def test_previous_cursor_returns_previous_page(self):
+        '''Проверяется возврат на предыдущую страницу по курсору.'''
+        first, second, _ = self.walk(INDEX_URL)
+        page_obj = self.guest_client.get(
+            INDEX_URL,
+            {'cursor': second.previous_cursor}).context['page_obj']
+        self.assertEqual(list(page_obj), list(first))
+        self.assertFalse(page_obj.has_previous())
+
+    def test_deep_page_costs_one_query(self):
+        '''Проверяется, что страница по курсору выбирается без COUNT.'''
+        _, second, _ = self.walk(INDEX_URL)
+        paginator = CursorPaginator(Post.objects.all(), POSTS_PER_PAGE)
+        with self.assertNumQueries(1):
+            list(paginator.page(second.next_cursor))
+
+    def test_invalid_cursor_falls_back_to_first_page(self):
+        '''Проверяется, что битый курсор отдаёт первую страницу.'''
+        first = self.walk(INDEX_URL)[0]
+        response = self.guest_client.get(INDEX_URL, {'cursor': '!bad!'})
+        self.assertEqual(list(response.context['page_obj']), list(first))
+
+    def test_page_number_still_works(self):
+        '''Проверяется, что старые ссылки ?page= продолжают работать.'''
+        response = self.guest_client.get(INDEX_URL, {'page': 3})
+        self.assertEqual(response.context['page_obj'].number, 3)
+        self.assertEqual(len(response.context['page_obj']), 3)
+
+
+@override_settings(QUERY_BUDGET_MODE='raise')
+class QueryBudgetViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=USERNAME)
+        cls.group = Group.objects.create(title=TITLE,
+                                         slug=SLUG,
+                                         description=DESCRIPTION)
+        # Разные авторы и группы у каждого поста, чтобы N+1 был заметен
+        for i in range(POSTS_PER_PAGE):
+            Post.objects.create(
+                author=User.objects.create(username=f'author_{i}'),
+                group=Group.objects.create(title=f'title_{i}',
+                                           slug=f'slug_{i}'),
+                text=TEXT)
+        Post.objects.bulk_create(
+            Post(author=cls.author, group=cls.group, text=TEXT)
+            for _ in range(POSTS_PER_PAGE))
+        cls.post = Post.objects.filter(author=cls.author).first()
+        cls.url_list = [
+            INDEX_URL,
+            GROUP_POSTS_URL,
+            PROFILE_URL,
+            reverse('posts:post_detail', args=[cls.post.id]),
+        ]
+
+    def setUp(self):
+        # Кэш страниц переживает откат базы между тестами
+        cache.clear()
+        self.guest_client = Client()
+        self.authorized_client = Client()
+        self.authorized_client.force_login(self.author)
+
+    def test_views_fit_query_budget(self):
+        '''Проверяется, что ленты укладываются в бюджет запросов.'''
+        for client in (self.guest_client, self.authorized_client):
+            for url in self.url_list:
+                with self.subTest(url=url, client=client):
+                    self.assertEqual(client.get(url).status_code, 200)
+
+    def test_budget_exceeded_raises(self):
+        '''Проверяется, что превышение бюджета не проходит незамеченным.'''
+        @query_budget(0)
+        def view(request):
+            return Post.objects.count()
+
+        request = RequestFactory().get(INDEX_URL)
+        with self.assertRaises(QueryBudgetExceeded):
+            view(request)
+        with override_settings(QUERY_BUDGET_MODE='log'):
+            with self.assertLogs('core.query_budget', 'WARNING'):
+                view(request)
+
+
+class CountStrategyViewsTest(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.author = User.objects.create(username=USERNAME)
+        # Посты по одному, чтобы сигналы вели счётчик автора
+        for _ in range(POSTS_PER_PAGE + 3):
+            Post.objects.create(author=cls.author, text=TEXT)
+
+    def setUp(self):
+        # Кэш страниц переживает откат базы между тестами
+        cache.clear()
+        self.guest_client = Client()
+
+    def count_queries(self, url, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.guest_client.get(url, data)
+        counts = [q for q in queries if 'COUNT(' in q['sql']]
+        return response.context['page_obj'], len(counts)
+
+    def test_probe_strategy_skips_count(self):
+        '''Проверяется режим probe: страницы по номерам без COUNT(*).'''
+        with mock.patch('posts.paginator.POSTS_COUNT_STRATEGY', 'probe'):
+            first, counts = self.count_queries(INDEX_URL, {'page': 1})
+            self.assertEqual(counts, 0)
+            self.assertTrue(first.has_next())
+            last, counts = self.count_queries(INDEX_URL, {'page': 2})
+            self.assertEqual(counts, 0)
+            self.assertEqual(len(last), 3)
+            self.assertFalse(last.has_next())
+            self.assertTrue(last.has_previous())
+
+    def test_cached_strategy_counts_once(self):
+        '''Проверяется режим cached: COUNT(*) берётся из кэша.'''
+        with mock.patch('posts.paginator.POSTS_COUNT_STRATEGY', 'cached'):
+            _, counts = self.count_queries(INDEX_URL, {'page': 1})
+            self.assertEqual(counts, 1)
+            page_obj, counts = self.count_queries(INDEX_URL, {'page': 2})
+            self.assertEqual(counts, 0)
+            self.assertEqual(page_obj.paginator.num_pages, 2)
+
+    def test_exact_strategy_by_default(self):
+        '''Проверяется, что по умолчанию число постов точное: новый пост
+        сразу виден в числе страниц.'''
+        first, counts = self.count_queries(INDEX_URL, {'page': 1})
+        self.assertEqual(counts, 1)
+        self.assertEqual(first.paginator.count, POSTS_PER_PAGE + 3)
+        Post.objects.create(author=self.author, text=TEXT)
+        last, _ = self.count_queries(INDEX_URL, {'page': 2})
+        self.assertEqual(last.paginator.count, POSTS_PER_PAGE + 4)
+        self.assertEqual(len(last), 4)
+
+    def test_stored_counter_used_for_profile(self):
+        '''Проверяется, что профиль берёт число постов из счётчика.'''
+        page_obj, counts = self.count_queries(PROFILE_URL, {'page': 1})
+        self.assertEqual(counts, 0)
+        self.assertEqual(page_obj.paginator.count, POSTS_PER_PAGE + 3)
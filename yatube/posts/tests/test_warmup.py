@@ -0,0 +1,39 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import Engine
+from django.template import engines
+from django.test import TestCase
+
+from core import warmup
+
+CACHED_LOADERS = [(
+    'django.template.loaders.cached.Loader', [
+        'django.template.loaders.filesystem.Loader',
+        'django.template.loaders.app_directories.Loader',
+    ],
+)]
+
+
+class WarmupTest(TestCase):
+    def test_templates_cached(self):
+        '''Проверяется, что шаблоны проекта и приложений попадают
+        в кэширующий загрузчик без ошибок.'''
+        engine = Engine(
+            dirs=[settings.TEMPLATES_DIR], loaders=CACHED_LOADERS,
+            libraries=engines['django'].engine.libraries)
+        compiled, failed = warmup.compile_templates(engine)
+        self.assertEqual(failed, [])
+        cache = engine.template_loaders[0].get_template_cache
+        for name in ('base.html', 'posts/index.html', 'admin/base.html'):
+            with self.subTest(name=name):
+                self.assertIn(name, cache)
+        self.assertEqual(len(cache), compiled)
+
+    def test_command(self):
+        '''Проверяется отчёт команды прогрева.'''
+        out = StringIO()
+        call_command('warmup', stdout=out)
+        self.assertIn('Разобрано шаблонов', out.getvalue())
+        self.assertGreater(warmup.populate_urls(), 0)
@@ -0,0 +1,43 @@
+import atexit
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+from django.conf import settings
+from django.test import override_settings
+
+FILE_CACHE = 'django.core.cache.backends.filebased.FileBasedCache'
+
+# Файловый кэш, общий с процессами из manage_in_other_process
+SHARED_CACHE_DIR = tempfile.mkdtemp()
+atexit.register(shutil.rmtree, SHARED_CACHE_DIR, True)
+
+
+def shared_cache():
+    '''Тесты идут с кэшем в памяти (core.test_runner); тестам, которые
+    смотрят на кэш из другого процесса, нужен кэш на диске.'''
+    return override_settings(CACHES={
+        'default': {'BACKEND': FILE_CACHE, 'LOCATION': SHARED_CACHE_DIR},
+    })
+
+
+def manage_in_other_process(*args):
+    '''Вывод команды manage.py, запущенной отдельным процессом с тем же
+    кэшем, что у теста под shared_cache().'''
+    cache_settings = settings.CACHES['default']
+    if cache_settings['BACKEND'] != FILE_CACHE:
+        raise RuntimeError('Другому процессу виден только shared_cache()')
+    env = dict(os.environ, YATUBE_CACHE_DIR=cache_settings['LOCATION'])
+    return subprocess.run(
+        [sys.executable, 'manage.py', *args], cwd=settings.BASE_DIR,
+        env=env, capture_output=True, text=True, check=True).stdout
+
+
+def read_in_other_process(key):
+    '''Значение ключа кэша, прочитанное отдельным процессом.'''
+    return manage_in_other_process(
+        'shell', '-c',
+        f'from django.core.cache import cache; print(cache.get({key!r}))',
+    ).strip()
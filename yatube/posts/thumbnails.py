@@ -0,0 +1,155 @@
+import logging
+
+from django.core.cache import cache
+from django.db import transaction
+from sorl.thumbnail import default
+from sorl.thumbnail.base import ThumbnailBackend
+from sorl.thumbnail.conf import defaults as default_settings
+from sorl.thumbnail.conf import settings as thumbnail_settings
+from sorl.thumbnail.images import ImageFile
+
+from core.server_timing import timed_function
+from posts import workers
+from posts.fragments import bump_version
+from posts.image_presets import PRESETS
+from posts.models import Post
+from posts.page_cache import bump_feeds
+from posts.page_cache import post_feeds
+from posts.settings import THUMBNAIL_WORKERS
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд повторная постановка того же файла в очередь игнорируется
+QUEUE_LOCK_TTL = 10 * 60
+
+
+class PregeneratingBackend(ThumbnailBackend):
+    """Бэкенд sorl, который умеет спросить о готовой миниатюре,
+    не создавая её."""
+
+    def thumbnail_options(self, source, options):
+        # Те же умолчания, что подставляет ThumbnailBackend.get_thumbnail,
+        # иначе имя файла миниатюры не совпадёт
+        options = dict(options)
+        if thumbnail_settings.THUMBNAIL_PRESERVE_FORMAT:
+            options.setdefault('format', self._get_format(source))
+        for key, value in self.default_options.items():
+            options.setdefault(key, value)
+        for key, attr in self.extra_options:
+            value = getattr(thumbnail_settings, attr)
+            if value != getattr(default_settings, attr):
+                options.setdefault(key, value)
+        return options
+
+    def thumbnail_file(self, file_, geometry_string, **options):
+        """Файл миниатюры, как его назовёт get_thumbnail."""
+        source = ImageFile(file_)
+        options = self.thumbnail_options(source, options)
+        name = self._get_thumbnail_filename(source, geometry_string, options)
+        return ImageFile(name, default.storage)
+
+    def get_cached_thumbnail(self, file_, geometry_string, **options):
+        return default.kvstore.get(
+            self.thumbnail_file(file_, geometry_string, **options))
+
+
+backend = PregeneratingBackend()
+
+
+def ready_variants(image, preset):
+    """Готовые варианты картинки по пресету: список
+    (формат, ширина, миниатюра) или None, если хоть одного нет.
+
+    Картинка без вариантов ставится в очередь на их создание.
+    """
+    return ready_variants_many([image], preset)[image.name]
+
+
+@timed_function('thumb')
+def ready_variants_many(images, preset):
+    """Как ready_variants для нескольких картинок: словарь по имени
+    файла. Хранилище sorl опрашивается один раз на все картинки."""
+    # Загрузки хранятся по содержимому: у постов страницы картинка
+    # может быть общей
+    images = {image.name: image for image in images}.values()
+    wanted = [
+        (image.name, image_format, width,
+         backend.thumbnail_file(image, geometry, **options))
+        for image in images
+        for image_format, width, geometry, options in
+        PRESETS[preset].variants()
+    ]
+    found = default.kvstore.get_many([file_ for *_, file_ in wanted])
+    variants = {image.name: [] for image in images}
+    for (name, image_format, width, _), thumbnail in zip(wanted, found):
+        if variants[name] is None:
+            continue
+        if thumbnail is None:
+            variants[name] = None
+            schedule(name)
+            continue
+        variants[name].append((image_format, width, thumbnail))
+    return variants
+
+
+def generate(name):
+    """Создаёт все варианты файла по всем пресетам.
+
+    Выполняется в рабочем процессе; очередь и версии сбрасываются
+    в общем кэше (CACHES), поэтому веб-процессы видят сброс.
+    """
+    for preset in PRESETS.values():
+        for _, _, geometry, options in preset.variants():
+            backend.get_thumbnail(name, geometry, **options)
+    cache.delete(queue_key(name))
+    # Карточки и ETag страниц с этой картинкой пора обновить
+    owners = list(Post.objects.filter(image=name).values_list(
+        'pk', 'author_id', 'group_id'))
+    for pk, _, _ in owners:
+        bump_version('post', pk)
+    if owners:
+        bump_feeds(post_feeds(
+            {author_id for _, author_id, _ in owners},
+            {group_id for _, _, group_id in owners}))
+
+
+def regenerate(name, force=False):
+    """Создаёт варианты файла заново; force удаляет уже готовые."""
+    if force:
+        default.kvstore.delete_thumbnails(ImageFile(name, default.storage))
+    generate(name)
+    return name
+
+
+def log_failure(future):
+    if future.exception() is not None:
+        logger.error('Не удалось создать миниатюры',
+                     exc_info=future.exception())
+
+
+def submit(name):
+    if not THUMBNAIL_WORKERS:
+        generate(name)
+        return
+    workers.executor('thumbnails', THUMBNAIL_WORKERS).submit(
+        generate, name).add_done_callback(log_failure)
+
+
+def queue_key(name):
+    return f'posts:thumbnail-queued:{name}'
+
+
+def forget(name):
+    """После коммита убирает из хранилища sorl замещённую картинку
+    и удаляет её миниатюры, если картинка больше ни у кого не стоит."""
+    if not name or Post.objects.filter(image=name).exists():
+        return
+    transaction.on_commit(
+        lambda: default.kvstore.delete(ImageFile(name, default.storage)))
+
+
+def schedule(name):
+    """Ставит создание миниатюр файла в очередь после коммита."""
+    if not name or not cache.add(queue_key(name), True, QUEUE_LOCK_TTL):
+        return
+    transaction.on_commit(lambda: submit(name))
@@ -0,0 +1,187 @@
+import heapq
+import logging
+
+from django.db import transaction
+from django.utils.functional import cached_property
+
+from posts import workers
+from posts.bulk import batches
+from posts.counters import shift_followers
+from posts.models import AuthorStats
+from posts.models import Follow
+from posts.models import Post
+from posts.models import TimelineEntry
+from posts.paginator import FORWARD
+from posts.paginator import CursorPaginator
+from posts.paginator import after_key
+from posts.settings import FANOUT_BATCH_SIZE
+from posts.settings import FANOUT_MAX_FOLLOWERS
+from posts.settings import FANOUT_WORKERS
+from posts.settings import FOLLOW_BACKFILL_POSTS
+
+logger = logging.getLogger(__name__)
+
+
+def fans_out(followers_count):
+    """Раскладывает ли автор с таким числом подписчиков посты по лентам.
+
+    Посты авторов с большим числом подписчиков не копируются в ленты,
+    а подмешиваются при чтении.
+    """
+    return followers_count <= FANOUT_MAX_FOLLOWERS
+
+
+def followers_count(author_id):
+    return AuthorStats.objects.filter(author_id=author_id).values_list(
+        'followers_count', flat=True).first() or 0
+
+
+def recent_posts(author_id):
+    """Ключи (id, pub_date) последних постов автора для ленты."""
+    return Post.objects.filter(author_id=author_id).order_by(
+        '-pub_date', '-id').values_list('pk', 'pub_date')[
+        :FOLLOW_BACKFILL_POSTS]
+
+
+def insert_entries(rows):
+    """Добавляет в ленты записи (user_id, post_id, pub_date);
+    уже разложенные посты пропускаются."""
+    for batch in batches(rows, FANOUT_BATCH_SIZE):
+        TimelineEntry.objects.bulk_create(
+            (TimelineEntry(user_id=user_id, post_id=post_id, pub_date=date)
+             for user_id, post_id, date in batch),
+            ignore_conflicts=True)
+
+
+def fan_out(post_ids):
+    """Раскладывает посты по лентам подписчиков их авторов.
+    Выполняется в рабочем процессе."""
+    by_author = {}
+    for pk, author_id, pub_date in Post.objects.filter(
+            pk__in=post_ids).values_list('pk', 'author_id', 'pub_date'):
+        by_author.setdefault(author_id, []).append((pk, pub_date))
+    for author_id, posts in by_author.items():
+        if not fans_out(followers_count(author_id)):
+            continue
+        # Подписчиков не больше FANOUT_MAX_FOLLOWERS, список невелик
+        followers = list(Follow.objects.filter(
+            author_id=author_id).values_list('user_id', flat=True))
+        insert_entries(
+            (user_id, pk, pub_date)
+            for pk, pub_date in posts for user_id in followers)
+
+
+def fan_out_recent(author_ids):
+    """Раскладывает недавние посты авторов с подписчиками; для загрузок
+    пачками, которые не шлют сигналов."""
+    followed = (
+        Follow.objects.filter(author_id__in=author_ids)
+        .order_by()
+        .values_list('author_id', flat=True)
+        .distinct())
+    for author_id in followed:
+        fan_out([pk for pk, _ in recent_posts(author_id)])
+
+
+def log_failure(future):
+    if future.exception() is not None:
+        logger.error('Не удалось разложить посты по лентам',
+                     exc_info=future.exception())
+
+
+def submit(post_ids):
+    if not FANOUT_WORKERS:
+        fan_out(post_ids)
+        return
+    workers.executor('fanout', FANOUT_WORKERS).submit(
+        fan_out, post_ids).add_done_callback(log_failure)
+
+
+def schedule(post_ids):
+    """Ставит раскладку постов по лентам в очередь после коммита."""
+    if post_ids:
+        transaction.on_commit(lambda: submit(post_ids))
+
+
+def schedule_new(post):
+    """Ставит в очередь раскладку нового поста, если её есть кому
+    получить. У большинства авторов подписчиков нет: их посты
+    не будят пул рабочих процессов."""
+    count = followers_count(post.author_id)
+    if count and fans_out(count):
+        schedule([post.pk])
+
+
+def reassign(post_id):
+    """Пост сменил автора: убирает его из лент и раскладывает заново."""
+    TimelineEntry.objects.filter(post_id=post_id).delete()
+    schedule([post_id])
+
+
+def follow_added(follow):
+    """Учитывает подписчика и кладёт в его ленту недавние посты автора."""
+    if fans_out(shift_followers(follow.author_id, 1)):
+        insert_entries(
+            (follow.user_id, pk, pub_date)
+            for pk, pub_date in recent_posts(follow.author_id))
+
+
+def follow_removed(follow):
+    """Убирает посты автора из ленты бывшего подписчика."""
+    count = shift_followers(follow.author_id, -1)
+    TimelineEntry.objects.filter(
+        user_id=follow.user_id, post__author_id=follow.author_id).delete()
+    if count == FANOUT_MAX_FOLLOWERS:
+        # Автор снова раскладывает посты: те, что подмешивались
+        # при чтении, переносятся в ленты подписчиков
+        schedule([pk for pk, _ in recent_posts(follow.author_id)])
+
+
+class TimelinePaginator(CursorPaginator):
+    """Лента подписок пользователя по ключу (pub_date, id).
+
+    Посты обычных авторов читаются из записей ленты одним диапазоном
+    индекса timeline_feed_idx, посты авторов без раскладки — из их
+    лент по post_author_feed_idx; всё сливается по ключу.
+    """
+
+    def __init__(self, user, per_page):
+        super().__init__(Post.objects.feed(), per_page)
+        self.user = user
+
+    @cached_property
+    def unfanned_authors(self):
+        return list(Follow.objects.filter(
+            user=self.user,
+            author__post_stats__followers_count__gt=FANOUT_MAX_FOLLOWERS,
+        ).values_list('author_id', flat=True))
+
+    def rows(self, direction, key, limit):
+        entries = after_key(
+            TimelineEntry.objects.filter(user=self.user),
+            direction, key, 'post_id')
+        sources = [[
+            (pub_date, pk, None) for pub_date, pk in
+            entries.values_list('pub_date', 'post_id')[:limit]
+        ]]
+        for author_id in self.unfanned_authors:
+            sources.append([
+                (post.pub_date, post.pk, post) for post in
+                self.query(direction, key).filter(author_id=author_id)[:limit]
+            ])
+        # Пост, разложенный до того, как автор перестал раскладывать,
+        # приходит из обоих источников подряд
+        chosen = {}
+        for _, pk, post in heapq.merge(
+                *sources, key=lambda row: row[:2],
+                reverse=direction == FORWARD):
+            if pk in chosen:
+                chosen[pk] = chosen[pk] or post
+                continue
+            if len(chosen) == limit:
+                break
+            chosen[pk] = post
+        missing = [pk for pk, post in chosen.items() if post is None]
+        if missing:
+            chosen.update(self.object_list.in_bulk(missing))
+        return [post for post in chosen.values() if post is not None]
@@ -0,0 +1,100 @@
+import hashlib
+import warnings
+
+from django.core.exceptions import ValidationError
+from django.core.files.uploadedfile import TemporaryUploadedFile
+from django.core.files.uploadhandler import FileUploadHandler
+from PIL import Image
+
+from posts.models import Post
+from posts.settings import IMAGE_FORMATS
+from posts.settings import IMAGE_MAX_PIXELS
+from posts.settings import IMAGE_UPLOAD_MAX_SIZE
+
+# Каталог хранилища, в котором картинки лежат под хэшем содержимого
+IMAGE_DIR = 'posts'
+
+
+class HashingUploadHandler(FileUploadHandler):
+    """Пишет загрузку кусками во временный файл, считая по пути SHA-256.
+
+    Всё, что сверх IMAGE_UPLOAD_MAX_SIZE, читается из запроса и
+    отбрасывается: файл помечается как обрезанный, и форма его отклонит.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.file = TemporaryUploadedFile(
+            self.file_name, self.content_type, 0, self.charset,
+            self.content_type_extra)
+        self.file.truncated = False
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        if start + len(raw_data) > IMAGE_UPLOAD_MAX_SIZE:
+            self.file.truncated = True
+        if not self.file.truncated:
+            self.hasher.update(raw_data)
+            self.file.write(raw_data)
+
+    def file_complete(self, file_size):
+        self.file.seek(0)
+        self.file.size = file_size
+        self.file.sha256 = self.hasher.hexdigest()
+        return self.file
+
+
+def inspect_image(file):
+    """Формат картинки по её заголовку, без распаковки пикселей."""
+    file.seek(0)
+    try:
+        with warnings.catch_warnings():
+            # Слишком большие картинки отклоняются ниже своим порогом
+            warnings.simplefilter('ignore', Image.DecompressionBombWarning)
+            with Image.open(file) as image:
+                image_format = image.format
+                width, height = image.size
+                if width * height > IMAGE_MAX_PIXELS:
+                    raise ValidationError(
+                        f'Картинка больше {IMAGE_MAX_PIXELS} пикселей')
+                image.verify()
+    except Image.DecompressionBombError:
+        raise ValidationError(f'Картинка больше {IMAGE_MAX_PIXELS} пикселей')
+    except (OSError, SyntaxError, ValueError):
+        raise ValidationError('Загрузите картинку')
+    finally:
+        file.seek(0)
+    if image_format not in IMAGE_FORMATS:
+        raise ValidationError(
+            'Допустимые форматы: ' + ', '.join(IMAGE_FORMATS))
+    return image_format
+
+
+def content_hash(file):
+    digest = getattr(file, 'sha256', None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        for chunk in file.chunks():
+            hasher.update(chunk)
+        file.seek(0)
+        digest = hasher.hexdigest()
+    return digest
+
+
+def store_image(file, image_format):
+    """Сохраняет картинку под хэшем содержимого и возвращает её имя.
+
+    Одинаковые файлы хранятся один раз: повторная загрузка только
+    возвращает имя уже лежащего файла.
+    """
+    digest = content_hash(file)
+    name = (f'{IMAGE_DIR}/{digest[:2]}/{digest}'
+            f'{IMAGE_FORMATS[image_format]}')
+    storage = Post._meta.get_field('image').storage
+    if storage.exists(name):
+        return name
+    saved = storage.save(name, file)
+    if saved != name:
+        # Тот же файл параллельно сохранил другой запрос
+        storage.delete(saved)
+    return name
@@ -1,5 +1,6 @@
 from django.urls import path
 
+from . import api
 from . import views
 
 app_name = 'posts'
@@ -7,14 +8,37 @@ app_name = 'posts'
 urlpatterns = [
     path('', views.index, name='index'),
     path('create/', views.post_create, name='post_create'),
+    path('search/', views.search, name='search'),
+    path('follow/', views.follow_index, name='follow_index'),
     path(
         'posts/<int:post_id>/edit/',
         views.post_edit,
         name='post_edit'),
+    path(
+        'posts/<int:post_id>/image/',
+        views.post_image,
+        name='post_image'),
     path('group/<slug:slug>/', views.group_posts, name='group_posts'),
     path('profile/<str:username>/', views.profile, name='profile'),
+    path(
+        'profile/<str:username>/follow/',
+        views.profile_follow,
+        name='profile_follow'),
+    path(
+        'profile/<str:username>/unfollow/',
+        views.profile_unfollow,
+        name='profile_unfollow'),
     path(
         'posts/<int:post_id>/',
         views.post_detail,
         name='post_detail'),
+    path('api/feed/', api.index, name='api_index'),
+    path(
+        'api/group/<slug:slug>/',
+        api.group_posts,
+        name='api_group_posts'),
+    path(
+        'api/profile/<str:username>/',
+        api.profile,
+        name='api_profile'),
 ]
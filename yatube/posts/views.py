@@ -3,48 +3,137 @@ from django.shortcuts import get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.shortcuts import redirect
 from django.shortcuts import render
-from django.core.paginator import Paginator
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.csrf import csrf_protect
+from django.views.decorators.http import require_POST
 
+from core.query_budget import query_budget
 from posts.forms import PostForm
+from posts.forms import PostImageForm
+from posts.models import AuthorStats
+from posts.models import Follow
 from posts.models import Group
 from posts.models import Post
 from posts.models import User
+from posts.page_cache import cache_anonymous_page
+from posts.page_cache import conditional_feed
+from posts.page_cache import post_feed
+from posts.paginator import CursorPaginator
+from posts.paginator import number_paginator
+from posts.search import search_posts
 from posts.settings import POSTS_PER_PAGE
+from posts.thumbnails import ready_variants_many
+from posts.timelines import TimelinePaginator
+from posts.uploads import HashingUploadHandler
+from posts.uploads import store_image
 
 
-def get_page(request, posts):
-    paginator = Paginator(posts, POSTS_PER_PAGE)
+def with_images(page):
+    # Миниатюры всех карточек страницы ищутся одним запросом; карточки
+    # затем находят их в памяти и кэше, а не запросом на пост
+    ready_variants_many([post.image for post in page if post.image], 'card')
+    return page
+
+
+def get_page(request, posts, count=None):
+    # Старые ссылки вида ?page=N обслуживаются обычным паджинатором
     page_number = request.GET.get('page')
-    return paginator.get_page(page_number)
+    if page_number is not None:
+        paginator = number_paginator(posts, POSTS_PER_PAGE, count)
+        return with_images(paginator.get_page(page_number))
+    paginator = CursorPaginator(posts, POSTS_PER_PAGE)
+    return with_images(paginator.get_page(request.GET.get('cursor')))
+
 
+def author_posts_count(author):
+    try:
+        return author.post_stats.posts_count
+    except AuthorStats.DoesNotExist:
+        return 0
 
+
+@conditional_feed('index')
+@cache_anonymous_page('index')
+@query_budget(3)
 def index(request):
     return render(request, 'posts/index.html', context={
-        'page_obj': get_page(request, Post.objects.all()),
+        'page_obj': get_page(request, Post.objects.feed()),
     })
 
 
+@conditional_feed('group:{slug}')
+@cache_anonymous_page('group:{slug}')
+@query_budget(4)
 def group_posts(request, slug):
     group = get_object_or_404(Group, slug=slug)
     return render(request, 'posts/group_list.html', context={
-        'page_obj': get_page(request, group.posts.all()),
+        'page_obj': get_page(
+            request, group.posts.feed(), group.posts_count),
         'group': group,
     })
 
 
+@conditional_feed('profile:{username}')
+@cache_anonymous_page('profile:{username}')
+@query_budget(4)
 def profile(request, username):
-    author = get_object_or_404(User, username=username)
-    posts = author.posts.all()
-    page_obj = get_page(request, posts)
+    author = get_object_or_404(
+        User.objects.select_related('post_stats'), username=username)
+    posts = author.posts.feed()
+    page_obj = get_page(request, posts, author_posts_count(author))
+    following = request.user.is_authenticated and Follow.objects.filter(
+        user=request.user, author=author).exists()
     context = {
         'page_obj': page_obj,
         'author': author,
+        'following': following,
     }
     return render(request, 'posts/profile.html', context)
 
 
+@login_required
+@query_budget(4)
+def follow_index(request):
+    paginator = TimelinePaginator(request.user, POSTS_PER_PAGE)
+    return render(request, 'posts/follow.html', context={
+        'page_obj': with_images(
+            paginator.get_page(request.GET.get('cursor'))),
+    })
+
+
+@login_required
+@require_POST
+def profile_follow(request, username):
+    author = get_object_or_404(User, username=username)
+    if author != request.user:
+        Follow.objects.get_or_create(user=request.user, author=author)
+    return redirect('posts:profile', username=username)
+
+
+@login_required
+@require_POST
+def profile_unfollow(request, username):
+    Follow.objects.filter(
+        user=request.user, author__username=username).delete()
+    return redirect('posts:profile', username=username)
+
+
+@query_budget(3)
+def search(request):
+    query = request.GET.get('q', '')
+    return render(request, 'posts/search.html', context={
+        'page_obj': with_images(search_posts(
+            query, request.GET.get('cursor'), POSTS_PER_PAGE)),
+        'query': query,
+    })
+
+
+@conditional_feed(post_feed)
+@query_budget(3)
 def post_detail(request, post_id):
-    post = get_object_or_404(Post, id=post_id)
+    post = get_object_or_404(
+        Post.objects.select_related('author__post_stats', 'group'),
+        id=post_id)
     context = {
         'post': post,
     }
@@ -86,3 +175,36 @@ def post_edit(request, post_id):
         'posts:post_detail',
         post_id=post.id
     )
+
+
+@login_required
+@csrf_exempt
+def post_image(request, post_id):
+    # Обработчик загрузки подменяется до того, как проверка CSRF
+    # прочитает тело запроса, поэтому сама проверка — внутри
+    request.upload_handlers = [HashingUploadHandler(request)]
+    return upload_post_image(request, post_id)
+
+
+@csrf_protect
+def upload_post_image(request, post_id):
+    post = get_object_or_404(Post, id=post_id)
+    if request.user != post.author:
+        return redirect(
+            'posts:post_detail',
+            post_id=post.id
+        )
+    form = PostImageForm(request.POST or None, request.FILES or None)
+    if not form.is_valid():
+        context = {
+            'post': post,
+            'form': form,
+            'is_edit': True
+        }
+        return render(request, 'posts/create_post.html', context)
+    post.image = store_image(form.cleaned_data['image'], form.image_format)
+    post.save(update_fields=['image'])
+    return redirect(
+        'posts:post_detail',
+        post_id=post.id
+    )
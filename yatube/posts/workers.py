@@ -0,0 +1,24 @@
+from concurrent.futures import ProcessPoolExecutor
+
+from django.db import connections
+
+# Пулы рабочих процессов по назначению, создаются при первой задаче
+_executors = {}
+
+
+def init_worker():
+    # Соединения с БД, унаследованные при fork, рабочему процессу нельзя
+    # ни использовать, ни закрывать — закрытие оборвёт сессию родителя.
+    # Он их забывает и открывает свои
+    import django
+    django.setup()
+    for connection in connections.all():
+        connection.connection = None
+
+
+def executor(name, max_workers):
+    """Пул процессов name; один на процесс веб-сервера."""
+    if name not in _executors:
+        _executors[name] = ProcessPoolExecutor(
+            max_workers=max_workers, initializer=init_worker)
+    return _executors[name]
@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from core import cache_versions
+
+
+def version_key(user_id):
+    return f'users:user-version:{user_id}'
+
+
+def forget_user(user_id):
+    """Меняет версию пользователя: следующий запрос прочтёт его из базы."""
+    cache_versions.bump_version(version_key(user_id))
+
+
+class CachedModelBackend(ModelBackend):
+    """ModelBackend, который берёт пользователя сессии из кэша.
+
+    В ключ входит версия пользователя; её меняют сигналы при сохранении,
+    удалении и смене групп и прав. Поэтому после смены пароля
+    auth.get_user сверяет хэш сессии со свежим пользователем, и чужие
+    сессии выходят, как и без кэша. Правки через QuerySet.update()
+    сигналов не шлют: после них нужен forget_user.
+    """
+
+    def get_user(self, user_id):
+        version = cache_versions.get_versions([version_key(user_id)])
+        key = f'users:user:{user_id}:{version}'
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, settings.USER_CACHE_TTL)
+        return user
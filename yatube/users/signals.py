@@ -0,0 +1,56 @@
+from django.contrib.auth.models import Group
+from django.db.models.signals import m2m_changed
+from django.db.models.signals import post_delete
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from posts.models import User
+from users.backends import forget_user
+
+# Изменения связей, после которых данные пользователя устарели
+M2M_ACTIONS = ('post_add', 'post_remove', 'post_clear')
+
+# Изменения со стороны группы или права: после очистки pk_set пуст,
+# поэтому затронутые пользователи ищутся до неё
+REVERSE_ACTIONS = ('post_add', 'post_remove', 'pre_clear')
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_changed_user(sender, instance, **kwargs):
+    # Пароль, имя, флаги и last_login меняются только сохранением
+    forget_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def forget_user_access(sender, instance, action, reverse, pk_set, **kwargs):
+    if not reverse:
+        if action in M2M_ACTIONS:
+            forget_user(instance.pk)
+        return
+    if action not in REVERSE_ACTIONS:
+        return
+    if action == 'pre_clear':
+        pk_set = instance.user_set.values_list('pk', flat=True)
+    for user_id in pk_set:
+        forget_user(user_id)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def forget_group_members(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not reverse:
+        if action not in M2M_ACTIONS:
+            return
+        groups = [instance.pk]
+    elif action == 'pre_clear':
+        groups = instance.group_set.values_list('pk', flat=True)
+    elif action in REVERSE_ACTIONS:
+        groups = pk_set
+    else:
+        return
+    members = User.objects.filter(groups__in=list(groups)).values_list(
+        'pk', flat=True).distinct()
+    for user_id in members:
+        forget_user(user_id)
@@ -45,11 +45,14 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # Первым, чтобы засечь все остальные middleware
+    'core.server_timing.ServerTimingMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    # AuthenticationMiddleware, не трогающий сессию анонимов без cookie
+    'core.middleware.SessionlessAuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -138,6 +141,57 @@ LOGIN_REDIRECT_URL = 'posts:index'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
 
+# Хранилище sorl-thumbnail с LRU в памяти процесса перед кэшем и БД
+THUMBNAIL_KVSTORE = 'posts.kvstore.KVStore'
+
+# Контроль числа SQL-запросов во view с @query_budget:
+# None — выключен, 'log' — предупреждение в лог, 'raise' — исключение
+QUERY_BUDGET_MODE = None
+
+# manage.py test и pytest (tests/conftest.py) включают проверку
+# бюджетов в режиме 'raise', см. core.test_runner.TEST_SETTINGS
+TEST_RUNNER = 'core.test_runner.TestRunner'
+
+# Отдавать ли клиентам заголовок Server-Timing. Замеры раскрывают
+# внутреннее устройство страниц, поэтому вне отладки он включается
+# явно; строка с замерами пишется в лог core.server_timing в любом случае
+SERVER_TIMING_HEADER = DEBUG
+
+# Замерять отрисовку шаблонов и их узлов; отчёт — manage.py
+# template_profile. Замеры заметно замедляют страницы
+TEMPLATE_PROFILER = False
+
+# Разбирать шаблоны и адреса при загрузке WSGI, до первого запроса.
+# Шаблоны запоминает только кэширующий загрузчик, он включён при
+# DEBUG = False; без него прогрев лишь замедлит запуск runserver
+WARMUP_ON_START = not DEBUG
+
+# Кэш общий для всех процессов: веб-процессов, рабочих процессов
+# миниатюр и лент и команд manage.py. С локальным кэшем процесса
+# (LocMemCache по умолчанию) выход и смена пароля, сброс версий лент
+# и счётчики не видны другим процессам. Файлы кэша видны процессам
+# одного сервера; на нескольких серверах нужен memcached или Redis.
+# Каталог меняет переменная окружения YATUBE_CACHE_DIR: через неё тесты
+# отдают свой кэш дочерним процессам
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ.get(
+            'YATUBE_CACHE_DIR', os.path.join(BASE_DIR, 'cache')),
+        'OPTIONS': {
+            # Карточки постов, версии и сессии: умолчания в 300 мало
+            'MAX_ENTRIES': 10_000,
+        },
+    }
+}
+
+# Пользователь сессии берётся из общего кэша, а сама сессия читается
+# из кэша и пишется в кэш и базу
+AUTHENTICATION_BACKENDS = ['users.backends.CachedModelBackend']
+SESSION_ENGINE = 'django.contrib.sessions.backends.cached_db'
+# Сколько секунд пользователь живёт в кэше
+USER_CACHE_TTL = 60 * 5
+
 #  подключаем движок filebased.EmailBackend
 EMAIL_BACKEND = 'django.core.mail.backends.filebased.EmailBackend'
 # указываем директорию, в которую будут складываться файлы писем
@@ -14,3 +14,11 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
 
 application = get_wsgi_application()
+
+# Импорт после настройки Django: модуль читает настройки и шаблоны
+from django.conf import settings  # noqa: E402
+
+from core.warmup import warmup  # noqa: E402
+
+if settings.WARMUP_ON_START:
+    warmup()